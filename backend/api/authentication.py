@@ -0,0 +1,133 @@
+"""Аутентификация по токену с кэшем «токен → пользователь».
+
+TokenAuthentication на каждый запрос выполняет JOIN токена и
+пользователя. Здесь результат хранится в ограниченном LRU-кэше
+процесса (TOKEN_CACHE_SIZE записей, каждая живёт TOKEN_CACHE_TTL
+секунд) и, если задан TOKEN_CACHE_ALIAS, в общем кэше Django, чтобы
+воркеры не прогревали свои кэши заново. Каждая запись помнит версию
+своего токена. Версии лежат в том же кэше, что и общие записи, и
+создаются только после успешной загрузки токена из базы; сигналы
+повышают версию при удалении токена (выход через djoser), изменении
+или деактивации пользователя, и устаревшая запись перестаёт
+приниматься во всех процессах. Поэтому на попадание приходится одно
+чтение версии из кэша вместо запроса к базе. При TOKEN_CACHE_TTL = 0
+(по умолчанию, если кэш версий в памяти процесса) токен каждый раз
+читается из базы, как в TokenAuthentication.
+"""
+import copy
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from apps.foodgram.versions import add_token_version, get_token_version
+
+SHARED_KEY = 'token_auth:{}'
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_stats = Counter()
+
+
+def count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def stats():
+    with _lock:
+        return {
+            name: _stats[name]
+            for name in ('hits', 'shared_hits', 'misses')
+        }
+
+
+def get_local(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return entry[1]
+
+
+def set_local(key, entry):
+    with _lock:
+        _entries[key] = (time.monotonic() + settings.TOKEN_CACHE_TTL, entry)
+        _entries.move_to_end(key)
+        while len(_entries) > settings.TOKEN_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def get_entry(self, key, version):
+        """(user, token) из кэша, если версия токена не изменилась."""
+        if version is None:
+            count('misses')
+            return None
+        entry = get_local(key)
+        if entry is not None and entry[2] == version:
+            count('hits')
+            return entry
+        if settings.TOKEN_CACHE_ALIAS:
+            entry = caches[settings.TOKEN_CACHE_ALIAS].get(
+                SHARED_KEY.format(key)
+            )
+            if entry is not None and entry[2] == version:
+                count('shared_hits')
+                set_local(key, entry)
+                return entry
+        count('misses')
+        return None
+
+    def fetch(self, key, version):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if version is None:
+            version = add_token_version(key)
+        entry = (token.user, token, version)
+        if version is None:
+            # Версию успели создать параллельно, возможно сбросом.
+            return entry
+        set_local(key, entry)
+        if settings.TOKEN_CACHE_ALIAS:
+            caches[settings.TOKEN_CACHE_ALIAS].set(
+                SHARED_KEY.format(key), entry, settings.TOKEN_CACHE_TTL
+            )
+        return entry
+
+    def authenticate_credentials(self, key):
+        if settings.TOKEN_CACHE_TTL <= 0:
+            return super().authenticate_credentials(key)
+        # Версия читается до запроса к базе: если токен удалят или
+        # пользователя изменят позже, версия повысится и только что
+        # закэшированная запись сразу устареет. Если версии ещё нет,
+        # fetch создаёт её после чтения из базы, а сброс, успевший
+        # раньше, не даёт ей создаться.
+        version = get_token_version(key)
+        entry = self.get_entry(key, version) or self.fetch(key, version)
+        user, token = entry[:2]
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        # Запросы не должны делить один объект пользователя.
+        user, token = copy.copy(user), copy.copy(token)
+        token.user = user
+        return user, token
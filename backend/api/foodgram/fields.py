@@ -0,0 +1,49 @@
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from apps.foodgram.images import get_image_urls
+
+
+class LimitedBase64ImageField(Base64ImageField):
+    """Base64ImageField с ограничением размера файла и числа пикселей.
+
+    Размер проверяется по длине base64-строки до декодирования, чтобы
+    не расшифровывать заведомо слишком большие файлы.
+    """
+    default_error_messages = {
+        'too_large': 'Размер картинки не должен превышать {max_size} байт.',
+        'too_many_pixels': 'Картинка не должна быть больше '
+                           '{max_pixels} пикселей.',
+    }
+
+    def __init__(self, max_size=None, max_pixels=None, **kwargs):
+        self.max_size = max_size or settings.RECIPE_IMAGE_MAX_SIZE
+        self.max_pixels = max_pixels or settings.RECIPE_IMAGE_MAX_PIXELS
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            payload = data.split(';base64,')[-1]
+            if len(payload) * 3 // 4 > self.max_size:
+                self.fail('too_large', max_size=self.max_size)
+        file = super().to_internal_value(data)
+        image = getattr(file, 'image', None)
+        if image is not None and image.width * image.height > self.max_pixels:
+            self.fail('too_many_pixels', max_pixels=self.max_pixels)
+        return file
+
+
+class RecipeImagesField(serializers.ReadOnlyField):
+    """Ссылки на оригинал и миниатюры картинки рецепта."""
+
+    def __init__(self, rendition=None, **kwargs):
+        self.rendition = rendition
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        urls = get_image_urls(recipe, self.context.get('request'))
+        if urls is None or self.rendition is None:
+            return urls
+        return urls[self.rendition]
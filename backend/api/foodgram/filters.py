@@ -1,7 +1,20 @@
+from django import forms
+from django.conf import settings
+from django.db.models import (Case, Count, Exists, IntegerField, OuterRef, Q,
+                              Value, When)
 from django_filters import rest_framework as filters
-from rest_framework.filters import SearchFilter
 
-from apps.foodgram.models import Recipe, Tag
+from apps.foodgram.models import Recipe, RecipeIngredient, Tag
+from apps.foodgram.recipe_index import recipe_index
+from apps.foodgram.search import search_recipes
+
+
+class IntegerFilter(filters.NumberFilter):
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(filters.BaseInFilter, IntegerFilter):
+    pass
 
 
 class RecipeFilterSet(filters.FilterSet):
@@ -12,11 +25,19 @@ class RecipeFilterSet(filters.FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         method='filter_tags', queryset=Tag.objects.all(), to_field_name='slug'
     )
+    search = filters.CharFilter(method='filter_search')
+    ingredients = IntegerInFilter(method='filter_ingredients')
+    missing = IntegerFilter(
+        method='filter_missing',
+        min_value=0,
+        max_value=settings.RECIPE_INDEX_MAX_MISSING
+    )
 
     class Meta:
         model = Recipe
         fields = (
-            'name', 'tags', 'author', 'is_favorited', 'is_in_shopping_cart'
+            'name', 'tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+            'search', 'ingredients', 'missing'
         )
 
     def filter_is_favorited(self, queryset, field_name, value):
@@ -32,9 +53,61 @@ class RecipeFilterSet(filters.FilterSet):
     @staticmethod
     def filter_tags(queryset, field_name, value):
         if value:
-            return queryset.filter(tags__in=value).distinct()
+            return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag__in=value
+            )))
         return queryset
 
+    @staticmethod
+    def filter_search(queryset, field_name, value):
+        if value.strip():
+            return search_recipes(queryset, value)
+        return queryset
 
-class IngredientFilter(SearchFilter):
-    search_param = 'name'
+    def filter_ingredients(self, queryset, field_name, value):
+        if not value:
+            return queryset
+        ingredient_ids = set(value)
+        missing = self.form.cleaned_data.get('missing')
+        if missing is None:
+            return queryset.filter(pk__in=RecipeIngredient.objects.filter(
+                ingredient_id__in=ingredient_ids
+            ).order_by().values('recipe_id').annotate(
+                found=Count('id')
+            ).filter(found=len(ingredient_ids)).values('recipe_id'))
+        groups = recipe_index.missing_at_most(ingredient_ids, missing)
+        if groups is None:
+            return self.missing_from_db(queryset, ingredient_ids, missing)
+        limit = settings.RECIPE_INDEX_MAX_RESULTS
+        limited = []
+        for group in groups:
+            limited.append(group[:limit])
+            limit -= len(limited[-1])
+        return queryset.filter(
+            pk__in=[pk for group in limited for pk in group]
+        ).annotate(missing_ingredients=Case(
+            *(When(pk__in=group, then=Value(count))
+              for count, group in enumerate(limited) if group),
+            output_field=IntegerField()
+        )).order_by('missing_ingredients', '-id')
+
+    @staticmethod
+    def missing_from_db(queryset, ingredient_ids, missing):
+        # Без индекса в памяти: те же рецепты и порядок одной группировкой.
+        found = Count(
+            'recipe_ingredients', distinct=True,
+            filter=Q(recipe_ingredients__ingredient_id__in=ingredient_ids)
+        )
+        return queryset.annotate(
+            found_ingredients=found,
+            missing_ingredients=Count(
+                'recipe_ingredients', distinct=True
+            ) - found
+        ).filter(
+            found_ingredients__gt=0, missing_ingredients__lte=missing
+        ).order_by('missing_ingredients', '-id')
+
+    @staticmethod
+    def filter_missing(queryset, field_name, value):
+        # Учитывается в filter_ingredients.
+        return queryset
@@ -0,0 +1,237 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from api.profiling import timer
+from apps.foodgram.versions import (RECIPE_VERSION_KEY, RECIPES_CACHE_ALIAS,
+                                    RECIPES_EPOCH_KEY, RECIPES_VERSION_KEY,
+                                    get_last_modified, get_version,
+                                    get_versions)
+
+from . import response_cache
+
+CATALOGUE_CACHE_KEY = 'catalogue:{}:{}'
+RECIPE_DATA_KEY = 'recipe_data:{}:{}:{}:{}'
+
+
+class CatalogueCacheMixin:
+    """Отдаёт список справочника с ETag и кэшированным JSON-телом.
+
+    Тело ответа сериализуется один раз на версию справочника
+    (version_key), поэтому при попадании в кэш не выполняется ни
+    запросов к базе, ни сериализации. Если клиент прислал актуальный
+    If-None-Match или If-Modified-Since, возвращается 304.
+    """
+    version_key = None
+
+    def list(self, request, *args, **kwargs):
+        version = get_version(self.version_key)
+        etag = f'"{self.version_key}-{version}"'
+        last_modified = get_last_modified(self.version_key)
+        if last_modified is not None:
+            last_modified = int(last_modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = CATALOGUE_CACHE_KEY.format(self.version_key, version)
+            body = cache.get(key)
+            if body is None:
+                data = super().list(request, *args, **kwargs).data
+                with timer('render'):
+                    body = JSONRenderer().render(data)
+                cache.set(key, body, settings.CATALOGUE_CACHE_TIMEOUT)
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class AnonymousCacheMixin:
+    """Кэширует JSON-ответы list и retrieve для анонимных пользователей.
+
+    Ключ включает версию набора рецептов, которую повышают сигналы
+    изменения рецептов, их ингредиентов, тегов и авторов, так что
+    устаревшие записи просто перестают запрашиваться.
+    """
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if (request.user.is_authenticated
+                or request.accepted_renderer.format != 'json'):
+            return handler(request, *args, **kwargs)
+        key = response_cache.make_key(
+            request, get_version(RECIPES_VERSION_KEY, RECIPES_CACHE_ALIAS)
+        )
+        body = response_cache.get(key)
+        if body is not None:
+            response = HttpResponse(body, content_type='application/json')
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            # Отдаётся то же тело, что сохранено в кэш, чтобы DRF не
+            # сериализовал данные ещё раз.
+            with timer('render'):
+                body = JSONRenderer().render(response.data)
+            response_cache.set(key, body)
+            response = HttpResponse(body, content_type='application/json')
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class UserOverlayMixin:
+    """Собирает ответы list и retrieve из общих представлений рецептов.
+
+    Представление рецепта одинаково для всех пользователей, кроме полей
+    is_favorited, is_in_shopping_cart и author.is_subscribed. Оно
+    кэшируется по версии рецепта, а пользовательские поля
+    подставляются при каждом запросе по множествам id избранного,
+    корзины и подписок, загруженным для страницы одним запросом каждое.
+    Параметр ids в list возвращает полные представления нескольких
+    рецептов в порядке запроса вместе со списком ненайденных id.
+    """
+
+    def get_shared_data(self, ids):
+        host = self.request.get_host()
+        versions = get_versions(
+            [RECIPE_VERSION_KEY.format(pk) for pk in ids]
+            + [RECIPES_EPOCH_KEY],
+            RECIPES_CACHE_ALIAS
+        )
+        keys = {
+            pk: RECIPE_DATA_KEY.format(
+                host, pk, versions[RECIPE_VERSION_KEY.format(pk)],
+                versions[RECIPES_EPOCH_KEY]
+            )
+            for pk in ids
+        }
+        recipe_cache = caches[response_cache.CACHE_ALIAS]
+        cached = recipe_cache.get_many(keys.values())
+        data = {pk: cached[key] for pk, key in keys.items() if key in cached}
+        missing = [pk for pk in ids if pk not in data]
+        if missing:
+            serializer = self.get_serializer(
+                self.get_queryset().filter(pk__in=missing), many=True
+            )
+            fresh = {
+                item['id']: self.apply_overlay(item, (), (), ())
+                for item in serializer.data
+            }
+            recipe_cache.set_many({
+                keys[pk]: item for pk, item in fresh.items()
+            })
+            data.update(fresh)
+        return data
+
+    @staticmethod
+    def apply_overlay(item, favorites, carts, following):
+        return dict(
+            item,
+            author=dict(
+                item['author'],
+                is_subscribed=item['author']['id'] in following
+            ),
+            is_favorited=item['id'] in favorites,
+            is_in_shopping_cart=item['id'] in carts
+        )
+
+    def get_recipes_data(self, ids):
+        shared = self.get_shared_data(ids)
+        items = [shared[pk] for pk in ids if pk in shared]
+        user = self.request.user
+        if user.is_anonymous or not items:
+            return items
+        ids = [item['id'] for item in items]
+        favorites = set(user.favorites.filter(
+            recipe_id__in=ids
+        ).values_list('recipe_id', flat=True))
+        carts = set(user.carts.filter(
+            recipe_id__in=ids
+        ).values_list('recipe_id', flat=True))
+        following = set(user.follower.filter(
+            author_id__in={item['author']['id'] for item in items}
+        ).values_list('author_id', flat=True))
+        return [
+            self.apply_overlay(item, favorites, carts, following)
+            for item in items
+        ]
+
+    @staticmethod
+    def as_list_item(item):
+        # В списках вместо оригинала отдаётся миниатюра картинки.
+        item = dict(item)
+        images = item.pop('images')
+        if images is not None:
+            item['image'] = images['thumbnail']
+        return item
+
+    def get_list_data(self, ids):
+        return [
+            self.as_list_item(item) for item in self.get_recipes_data(ids)
+        ]
+
+    def get_requested_ids(self):
+        try:
+            ids = [
+                int(pk) for pk in self.request.query_params['ids'].split(',')
+                if pk.strip()
+            ]
+        except ValueError:
+            raise ValidationError(
+                {'ids': 'Ожидается список id через запятую.'}
+            )
+        if len(ids) > settings.RECIPE_MULTI_GET_LIMIT:
+            raise ValidationError({'ids': 'Не больше {} id за запрос.'.format(
+                settings.RECIPE_MULTI_GET_LIMIT
+            )})
+        return list(dict.fromkeys(ids))
+
+    def multi_get(self):
+        # Полные представления в порядке запроса и id, которых нет.
+        ids = self.get_requested_ids()
+        items = self.get_recipes_data(ids)
+        found = {item['id'] for item in items}
+        return Response({
+            'results': items,
+            'missing': [pk for pk in ids if pk not in found]
+        })
+
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.multi_get()
+        queryset = self.filter_queryset(self.queryset.all()).values('id')
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.get_list_data(
+                [row['id'] for row in queryset]
+            ))
+        return self.get_paginated_response(
+            self.get_list_data([row['id'] for row in page])
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404
+        data = self.get_recipes_data([pk])
+        if not data:
+            raise Http404
+        return Response(data[0])
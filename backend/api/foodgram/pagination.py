@@ -1,6 +1,47 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class LimitCursorPagination(CursorPagination):
+    """Постраничный вывод по курсору: без COUNT(*) и OFFSET.
+
+    Курсор хранит позицию по id, поэтому списки с другим порядком
+    (релевантность поиска, число недостающих ингредиентов) так не
+    листаются: вместо подмены их порядка возвращается ошибка 400.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        order_by = tuple(queryset.query.order_by)
+        if order_by and order_by != (self.ordering,):
+            raise ValidationError({'pagination': (
+                'Курсорная пагинация недоступна для поиска и подбора по '
+                'ингредиентам, используйте page и limit.'
+            )})
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CursorPaginationMixin:
+    """Включает LimitCursorPagination по запросу клиента.
+
+    Курсорный режим выбирается параметром ?pagination=cursor (или
+    наличием cursor в ссылках next/previous); иначе используется
+    pagination_class с полем count.
+    """
+    cursor_pagination_class = LimitCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+                return self._paginator
+        return super().paginator
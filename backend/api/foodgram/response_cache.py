@@ -0,0 +1,44 @@
+"""Кэш отрендеренных JSON-ответов, ключом служит версия набора рецептов."""
+import hashlib
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+
+from apps.foodgram.versions import RECIPES_CACHE_ALIAS
+
+CACHE_ALIAS = RECIPES_CACHE_ALIAS
+KEY = 'response:{}:{}'
+
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def make_key(request, version):
+    """Ключ из пути и нормализованных параметров запроса.
+
+    Параметры сортируются по имени и значениям, поэтому
+    ?tags=a&tags=b и ?tags=b&tags=a попадают в одну запись.
+    """
+    params = sorted(
+        (name, tuple(sorted(request.query_params.getlist(name))))
+        for name in request.query_params
+    )
+    raw = repr((request.get_host(), request.path, params))
+    return KEY.format(version, hashlib.md5(raw.encode()).hexdigest())
+
+
+def get(key):
+    body = caches[CACHE_ALIAS].get(key)
+    with _lock:
+        _stats['hits' if body is not None else 'misses'] += 1
+    return body
+
+
+def set(key, body):
+    caches[CACHE_ALIAS].set(key, body)
+
+
+def stats():
+    with _lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses']}
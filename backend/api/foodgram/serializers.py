@@ -1,19 +1,33 @@
-from django.shortcuts import get_object_or_404
-from drf_extra_fields.fields import Base64ImageField
-from rest_framework import serializers, validators
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import serializers
 
+from api.profiling import ProfiledSerializerMixin
 from api.users.serializers import CustomUserSerializer
-from apps.foodgram.models import (Cart, Favorite, Ingredient, Recipe,
-                                  RecipeIngredient, Tag)
+from apps.foodgram import cart_totals
+from apps.foodgram.models import (Cart, CartIngredient, Favorite, Ingredient,
+                                  Recipe, RecipeIngredient, Tag)
 
+from .fields import LimitedBase64ImageField, RecipeImagesField
 
-class TagSerializer(serializers.ModelSerializer):
+RECIPE_PREFETCH = (
+    'tags',
+    Prefetch(
+        'recipe_ingredients',
+        queryset=RecipeIngredient.objects.select_related('ingredient')
+    )
+)
+
+
+class TagSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(ProfiledSerializerMixin,
+                           serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
@@ -32,17 +46,19 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
             'recipe': {'write_only': True},
             'ingredient': {'write_only': True}
         }
-        validators = [validators.UniqueTogetherValidator(
-            queryset=RecipeIngredient.objects.all(),
-            fields=('recipe', 'ingredient'),
-            message='Ингредиенты должны быть уникальными!'
-        )]
 
-    def create(self, validated_data):
-        return RecipeIngredient.objects.create(**validated_data)
+
+class CartIngredientSerializer(serializers.ModelSerializer):
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = CartIngredient
+        fields = ('name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     author = CustomUserSerializer(read_only=True)
@@ -51,7 +67,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only=True,
         many=True
     )
-    image = Base64ImageField()
+    image = LimitedBase64ImageField()
+    images = RecipeImagesField()
     cooking_time = serializers.IntegerField(min_value=1)
 
     class Meta:
@@ -65,6 +82,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
             'text',
             'cooking_time'
         )
@@ -73,26 +91,28 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorite.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return Cart.objects.filter(user=request.user, recipe=obj).exists()
 
     @staticmethod
     def save_recipe_ingredients(recipe, ingredients):
-        for ingredient in ingredients:
-            recipe_ingredient = RecipeIngredientSerializer(
-                data={
-                    'recipe': recipe.pk,
-                    'ingredient': ingredient.get('id'),
-                    'amount': ingredient.get('amount')
-                }
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount']
             )
-            recipe_ingredient.is_valid(raise_exception=True)
-            recipe_ingredient.save()
+            for ingredient in ingredients
+        )
 
     def validate(self, attrs):
         ingredients = self.initial_data.get('ingredients')
@@ -101,18 +121,48 @@ class RecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'ingredients': 'Отсутствуют ингридиенты!'}
             )
+        ingredient_items = []
         for ingredient_item in ingredients:
-            get_object_or_404(
-                Ingredient, id=ingredient_item.get('id')
-            )
-            if int(ingredient_item.get('amount')) <= 0:
+            try:
+                ingredient_id = int(ingredient_item.get('id'))
+                amount = int(ingredient_item.get('amount'))
+            except (AttributeError, TypeError, ValueError):
+                raise serializers.ValidationError(
+                    {'ingredients': 'Некорректный формат ингридиента!'}
+                )
+            if amount <= 0:
                 raise serializers.ValidationError(
                     {'ingredients': 'Количество ингридиента '
                                     'должно быть больше 0!'}
                 )
-        attrs['ingredients'] = ingredients
+            if amount > settings.MAX_VALUE_TO_SMALL_INT_FIELD:
+                raise serializers.ValidationError(
+                    {'ingredients': 'Количество ингридиента должно быть '
+                                    'не больше {}!'.format(
+                                        settings.MAX_VALUE_TO_SMALL_INT_FIELD
+                                    )}
+                )
+            ingredient_items.append({'id': ingredient_id, 'amount': amount})
+        ingredient_ids = [item['id'] for item in ingredient_items]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                {'ingredients': 'Ингредиенты должны быть уникальными!'}
+            )
+        missing_ids = set(ingredient_ids).difference(
+            Ingredient.objects.filter(
+                id__in=ingredient_ids
+            ).values_list('id', flat=True)
+        )
+        if missing_ids:
+            raise serializers.ValidationError(
+                {'ingredients': 'Ингредиенты не найдены: {}'.format(
+                    ', '.join(map(str, sorted(missing_ids)))
+                )}
+            )
+        attrs['ingredients'] = ingredient_items
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -121,55 +171,69 @@ class RecipeSerializer(serializers.ModelSerializer):
         self.save_recipe_ingredients(recipe, ingredients)
         return recipe
 
+    @classmethod
+    def update_recipe_ingredients(cls, recipe, ingredients):
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        amounts = {item['id']: item['amount'] for item in ingredients}
+        deltas = {}
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            item = current.get(ingredient_id)
+            if item is None:
+                deltas[ingredient_id] = amount
+            elif item.amount != amount:
+                deltas[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        removed = []
+        for ingredient_id, item in current.items():
+            if ingredient_id not in amounts:
+                deltas[ingredient_id] = -item.amount
+                removed.append(item.pk)
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        cls.save_recipe_ingredients(recipe, [
+            item for item in ingredients if item['id'] not in current
+        ])
+        return deltas
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        instance.tags.set(validated_data.pop('tags'))
-        instance.recipe_ingredients.all().delete()
-        self.save_recipe_ingredients(
+        if 'tags' in validated_data:
+            instance.tags.set(validated_data.pop('tags'))
+        deltas = self.update_recipe_ingredients(
             instance, validated_data.pop('ingredients')
         )
+        if deltas:
+            cart_totals.apply_recipe_changes(instance.pk, deltas)
         return super().update(instance, validated_data)
 
-
-class ShortRecipeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-
-    def validate(self, attrs):
-        if Favorite.objects.filter(
-                user=attrs.get('user'), recipe=attrs.get('recipe')
-        ).exists():
-            raise serializers.ValidationError(
-                {'favorite': 'Рецепт уже в избранном!'}
-            )
-        return attrs
-
     def to_representation(self, instance):
-        return ShortRecipeSerializer(instance=instance.recipe).data
+        prefetch_related_objects([instance], *RECIPE_PREFETCH)
+        return super().to_representation(instance)
 
 
-class CartSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(ProfiledSerializerMixin,
+                            serializers.ModelSerializer):
+    image = RecipeImagesField(rendition='thumbnail')
 
     class Meta:
-        model = Cart
-        fields = ('user', 'recipe')
+        model = Recipe
+        fields = ('id', 'name', 'image', 'cooking_time')
 
-    def validate(self, attrs):
-        if Cart.objects.filter(
-                user=attrs.get('user'), recipe=attrs.get('recipe')
-        ).exists():
-            raise serializers.ValidationError(
-                {'favorite': 'Рецепт уже в корзине!'}
-            )
-        return attrs
 
-    def to_representation(self, instance):
-        return ShortRecipeSerializer(instance=instance.recipe).data
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BATCH_LIMIT
+    )
+
+    @staticmethod
+    def validate_recipes(value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,85 @@
+import io
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from apps.foodgram.versions import (CART_VERSION_KEY, CARTS_EPOCH_KEY,
+                                    INGREDIENTS_VERSION_KEY, get_versions)
+
+FONT_NAME = 'ExtraBold'
+FONT_PATH = Path(settings.BASE_DIR) / 'extrabold.ttf'
+TITLE = 'Список покупок.'
+TITLE_SIZE = 36
+FONT_SIZE = 14
+LEADING = 20
+MARGIN = 50
+INDENT = 100
+CACHE_KEY = 'shopping_list_pdf:{}:{}:{}:{}'
+
+_font_lock = threading.Lock()
+
+
+def register_fonts():
+    """Регистрирует шрифт один раз на процесс."""
+    if FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return
+    with _font_lock:
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'utf-8'))
+
+
+def get_shopping_list(user):
+    return user.cart_ingredients.values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('ingredient__name')
+
+
+def render_shopping_list(rows, output):
+    """Рисует список покупок в output, перенося строки на новые страницы."""
+    register_fonts()
+    width, height = A4
+    cnv = canvas.Canvas(output, pagesize=A4)
+    cnv.setFont(FONT_NAME, TITLE_SIZE)
+    cnv.drawString(150, height - 42, TITLE)
+    y = height - 92
+    for counter, (ingredient, unit, amount) in enumerate(rows, start=1):
+        lines = simpleSplit(
+            f'{counter}. {ingredient} ({unit}) - {amount}',
+            FONT_NAME, FONT_SIZE, width - INDENT - MARGIN
+        )
+        for line in lines:
+            if y < MARGIN:
+                cnv.showPage()
+                y = height - MARGIN
+            cnv.setFont(FONT_NAME, FONT_SIZE)
+            cnv.drawString(INDENT, y, line)
+            y -= LEADING
+    cnv.showPage()
+    cnv.save()
+    return output
+
+
+def get_shopping_list_pdf(user):
+    """Возвращает PDF списка покупок, закэшированный по версии корзины."""
+    cart_key = CART_VERSION_KEY.format(user.pk)
+    versions = get_versions(
+        [cart_key, CARTS_EPOCH_KEY, INGREDIENTS_VERSION_KEY]
+    )
+    key = CACHE_KEY.format(
+        user.pk, versions[cart_key], versions[CARTS_EPOCH_KEY],
+        versions[INGREDIENTS_VERSION_KEY]
+    )
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_shopping_list(
+            get_shopping_list(user), io.BytesIO()
+        ).getvalue()
+        cache.set(key, pdf, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return pdf
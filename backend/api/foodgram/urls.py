@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.foodgram.views import IngredientViewSet, RecipeViewSet, TagViewSet
+from api.foodgram.views import (IngredientViewSet, RecipeViewSet,
+                                ResponseCacheStatsView, TagViewSet)
 
 router = DefaultRouter()
 router.register('tags', TagViewSet)
@@ -9,5 +10,6 @@ router.register('ingredients', IngredientViewSet)
 router.register('recipes', RecipeViewSet)
 
 urlpatterns = [
+    path('cache-stats/', ResponseCacheStatsView.as_view()),
     path('', include(router.urls)),
 ]
@@ -1,40 +1,63 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+import io
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import FileResponse, Http404
 from django_filters import rest_framework as filters
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from rest_framework import status, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-
-from api.foodgram.serializers import (CartSerializer, IngredientSerializer,
-                                      RecipeSerializer, TagSerializer)
-from apps.foodgram.models import (Cart, Favorite, Ingredient, Recipe,
-                                  RecipeIngredient, Tag)
-
-from .filters import IngredientFilter, RecipeFilterSet
-from .pagination import LimitPageNumberPagination
+from rest_framework.views import APIView
+
+from api.foodgram.serializers import (RECIPE_PREFETCH,
+                                      CartIngredientSerializer,
+                                      IngredientSerializer,
+                                      RecipeIdsSerializer, RecipeSerializer,
+                                      ShortRecipeSerializer, TagSerializer)
+from apps.foodgram import user_recipes
+from apps.foodgram.ingredient_index import ingredient_index
+from apps.foodgram.models import Cart, Favorite, Ingredient, Recipe, Tag
+from apps.foodgram.versions import INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
+from apps.users.models import Follow, User
+
+from . import response_cache
+from .filters import RecipeFilterSet
+from .mixins import AnonymousCacheMixin, CatalogueCacheMixin, UserOverlayMixin
+from .pagination import CursorPaginationMixin, LimitPageNumberPagination
 from .permissions import IsOwnerOrReadOnly
-from .serializers import FavoriteSerializer
+from .shopping_list import get_shopping_list_pdf
 
+NOT_ADDED_MESSAGES = {
+    Favorite: 'Рецепта нет в избранном!',
+    Cart: 'Рецепта нет в списке покупок!',
+}
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(CatalogueCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    version_key = TAGS_VERSION_KEY
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogueCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
-    search_fields = ('^name',)
-    filter_backends = (IngredientFilter, )
+    version_key = INGREDIENTS_VERSION_KEY
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            name, settings.INGREDIENT_SEARCH_LIMIT
+        ))
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, UserOverlayMixin,
+                    CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     filterset_class = RecipeFilterSet
@@ -42,71 +65,125 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.DjangoFilterBackend,)
     pagination_class = LimitPageNumberPagination
 
+    def get_queryset(self):
+        user = self.request.user
+        authors = User.objects.all()
+        queryset = Recipe.objects.prefetch_related(*RECIPE_PREFETCH)
+        if user.is_authenticated:
+            authors = authors.annotate(is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    Cart.objects.filter(user=user, recipe=OuterRef('pk'))
+                )
+            )
+        return queryset.prefetch_related(Prefetch('author', queryset=authors))
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @staticmethod
-    def saveobject(request, serializer_class, pk):
-        data = {
-            'user': request.user.pk,
-            'recipe': pk
-        }
-        serializer = serializer_class(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def saveobject(self, request, model, pk):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        created = user_recipes.add(model, request.user.pk, (recipe.pk,))
+        return Response(
+            ShortRecipeSerializer(
+                recipe, context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
     @staticmethod
     def deleteobject(request, model, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        obj = get_object_or_404(model, user=request.user, recipe=recipe)
-        obj.delete()
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        if not user_recipes.remove(model, request.user.pk, (pk,)):
+            return Response(
+                {'errors': NOT_ADDED_MESSAGES[model]},
+                status=status.HTTP_404_NOT_FOUND
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'],
+            permission_classes=(permissions.IsAuthenticated,))
     def favorite(self, request, pk=None):
-        return self.saveobject(request, FavoriteSerializer, pk)
+        return self.saveobject(request, Favorite, pk)
 
     @favorite.mapping.delete
     def delete_favorite(self, request, pk=None):
         return self.deleteobject(request, Favorite, pk)
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'],
+            permission_classes=(permissions.IsAuthenticated,))
     def shopping_cart(self, request, pk=None):
-        return self.saveobject(request, CartSerializer, pk)
+        return self.saveobject(request, Cart, pk)
 
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, pk=None):
         return self.deleteobject(request, Cart, pk)
 
     @staticmethod
-    def pdf_shopping_cart(queryset):
-        pdfmetrics.registerFont(
-            TTFont('ExtraBold', 'extrabold.ttf', 'utf-8'))
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = ('attachment; '
-                                           'filename="shopping_cart.pdf"')
-        cnv = canvas.Canvas(response)
-        cnv.setFont('ExtraBold', 36)
-        cnv.drawString(150, 800, "Список покупок.")
-        cnv.setFont('ExtraBold', 14)
-        text_object = cnv.beginText(100, 750)
-        counter = 1
-        for ingredient, unit, amount in queryset:
-            text_object.textLine(
-                f'{counter}. {ingredient} ({unit}) - {amount}'
+    def batch(request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            found = set(Recipe.objects.filter(
+                pk__in=recipe_ids
+            ).values_list('pk', flat=True))
+            added = user_recipes.add(model, request.user.pk, found)
+            outcomes = {
+                pk: 'added' if pk in added else 'exists' for pk in found
+            }
+        else:
+            outcomes = dict.fromkeys(
+                user_recipes.remove(model, request.user.pk, recipe_ids),
+                'removed'
             )
-            counter += 1
-        cnv.drawText(text_object)
-        cnv.showPage()
-        cnv.save()
-        return response
-
-    @action(detail=False)
+        return Response({'results': [
+            {'id': pk, 'status': outcomes.get(pk, 'not_found')}
+            for pk in recipe_ids
+        ]})
+
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            url_name='favorite-batch',
+            permission_classes=(permissions.IsAuthenticated,))
+    def favorite_batch(self, request):
+        return self.batch(request, Favorite)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', url_name='shopping-cart-batch',
+            permission_classes=(permissions.IsAuthenticated,))
+    def shopping_cart_batch(self, request):
+        return self.batch(request, Cart)
+
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
+    def shopping_list(self, request):
+        serializer = CartIngredientSerializer(
+            request.user.cart_ingredients.select_related(
+                'ingredient'
+            ).order_by('ingredient__name'),
+            many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
     def download_shopping_cart(self, request):
-        queryset = RecipeIngredient.objects.filter(
-            recipe__carts__user=request.user
-        ).values_list(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(Sum('amount')).order_by('ingredient__name')
-        return self.pdf_shopping_cart(queryset)
+        return FileResponse(
+            io.BytesIO(get_shopping_list_pdf(request.user)),
+            as_attachment=True,
+            filename='shopping_cart.pdf',
+            content_type='application/pdf'
+        )
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response(response_cache.stats())
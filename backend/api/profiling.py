@@ -0,0 +1,219 @@
+"""Профилирование запросов: Server-Timing и гистограммы по view.
+
+ProfilingMiddleware включается настройкой PROFILING. Для каждого
+запроса она считает число и время SQL-запросов (через
+execute_wrapper), время сериализации (ProfiledSerializerMixin и
+блоки timer('serializer')) и рендеринга ответа, отдаёт их в заголовке
+Server-Timing и складывает в гистограммы по имени view. Эндпоинт
+/api/metrics/ отдаёт гистограммы и статистику кэшей ответов и
+аутентификации по токену в текстовом формате Prometheus; он доступен
+только при заданном METRICS_TOKEN с заголовком «Authorization: Bearer
+<токен>». Метрики хранятся в памяти процесса, поэтому каждый воркер
+gunicorn собирается отдельно.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from api import authentication
+from api.foodgram import response_cache
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+# Метрика: имя в Prometheus, описание, границы корзин.
+HISTOGRAMS = {
+    'total': ('foodgram_request_duration_seconds',
+              'Время обработки запроса', DURATION_BUCKETS),
+    'db': ('foodgram_db_duration_seconds',
+           'Время SQL-запросов за запрос', DURATION_BUCKETS),
+    'serializer': ('foodgram_serializer_duration_seconds',
+                   'Время сериализации за запрос', DURATION_BUCKETS),
+    'render': ('foodgram_render_duration_seconds',
+               'Время рендеринга ответа', DURATION_BUCKETS),
+    'queries': ('foodgram_db_queries',
+                'Число SQL-запросов за запрос', QUERY_BUCKETS),
+}
+# Сборщики дополнительных счётчиков: функция возвращает словарь
+# «имя метрики → значение».
+COLLECTORS = [
+    lambda: {
+        f'foodgram_response_cache_{name}_total': value
+        for name, value in response_cache.stats().items()
+    },
+    lambda: {
+        f'foodgram_token_cache_{name}_total': value
+        for name, value in authentication.stats().items()
+    },
+]
+
+_profile = ContextVar('profile', default=None)
+_lock = threading.Lock()
+_histograms = {}
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = {'db': 0.0, 'serializer': 0.0, 'render': 0.0}
+        self.depth = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timings['db'] += time.perf_counter() - start
+
+
+@contextmanager
+def timer(name):
+    """Прибавляет время блока к метрике name текущего запроса.
+
+    Вложенные блоки с тем же именем не считаются повторно, так что
+    вложенные сериализаторы не удваивают время.
+    """
+    profile = _profile.get()
+    if profile is None or profile.depth.get(name):
+        yield
+        return
+    profile.depth[name] = 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.timings[name] = (
+            profile.timings.get(name, 0.0) + time.perf_counter() - start
+        )
+        profile.depth[name] = 0
+
+
+class ProfiledSerializerMixin:
+    """Учитывает to_representation сериализатора как время сериализации."""
+
+    def to_representation(self, instance):
+        with timer('serializer'):
+            return super().to_representation(instance)
+
+
+def observe(view, values):
+    with _lock:
+        for metric, value in values.items():
+            buckets = HISTOGRAMS[metric][2]
+            counts, total = _histograms.get(
+                (metric, view), ([0] * (len(buckets) + 1), 0)
+            )
+            counts[bisect_left(buckets, value)] += 1
+            _histograms[metric, view] = (counts, total + value)
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = Profile()
+        token = _profile.set(profile)
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        total = time.perf_counter() - profile.started
+        timings = profile.timings
+        response['Server-Timing'] = ', '.join((
+            f'db;desc="{profile.queries} queries";'
+            f'dur={timings["db"] * 1000:.1f}',
+            f'serializer;dur={timings["serializer"] * 1000:.1f}',
+            f'render;dur={timings["render"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        observe(get_view_name(request), {
+            'total': total,
+            'db': timings['db'],
+            'serializer': timings['serializer'],
+            'render': timings['render'],
+            'queries': profile.queries,
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после выхода из view.
+        profile = _profile.get()
+        if profile is None:
+            return response
+        start = time.perf_counter()
+
+        def rendered(response):
+            profile.timings['render'] += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def format_labels(**labels):
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels.items()
+    ) + '}'
+
+
+def render_metrics():
+    """Гистограммы и счётчики в текстовом формате Prometheus."""
+    with _lock:
+        histograms = {
+            key: (list(counts), total)
+            for key, (counts, total) in _histograms.items()
+        }
+    lines = []
+    for metric, (name, description, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for (key, view), (counts, total) in sorted(histograms.items()):
+            if key != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), counts):
+                cumulative += count
+                labels = format_labels(view=view, le=bound)
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = format_labels(view=view)
+            lines.append(f'{name}_sum{labels} {total}')
+            lines.append(f'{name}_count{labels} {cumulative}')
+    for collect in COLLECTORS:
+        for name, value in sorted(collect().items()):
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
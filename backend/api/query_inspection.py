@@ -0,0 +1,138 @@
+"""Поиск N+1 и медленных SQL-запросов для тестов и стенда.
+
+Все запросы, выполненные в блоке inspect_queries() или в рамках
+запроса к API при включённой QueryInspectionMiddleware (настройка
+QUERY_INSPECTION), группируются по нормализованному тексту: литералы
+заменяются на «?», а списки параметров IN схлопываются, поэтому
+запросы одной формы попадают в одну группу. Группа, повторившаяся
+не меньше QUERY_REPEAT_THRESHOLD раз, считается N+1 и попадает в лог
+вместе со стеком кода проекта, выполнившего первый повтор. Запросы
+дольше SLOW_QUERY_MS пишутся в лог сразу. С QUERY_INSPECTION_RAISE
+(или raise_errors=True) найденные N+1 приводят к
+QueryInspectionError, так что тест падает.
+"""
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+NORMALIZE_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'(?:%s|\?)(?:\s*,\s*(?:%s|\?))+'), '...'),
+    (re.compile(r'\s+'), ' '),
+)
+# Служебные запросы транзакций повторяются законно.
+IGNORED = re.compile(r'^(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO)', re.I)
+STACK_DEPTH = 8
+
+
+class QueryInspectionError(AssertionError):
+    pass
+
+
+def normalize(sql):
+    for pattern, replacement in NORMALIZE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_project_stack():
+    """Кадры стека из кода проекта, без Django и библиотек."""
+    root = os.path.join(settings.BASE_DIR, '')
+    this = os.path.abspath(__file__)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(root)
+        and os.path.abspath(frame.filename) != this
+        and 'site-packages' not in frame.filename
+    ]
+    return traceback.format_list(frames[-STACK_DEPTH:])
+
+
+class QueryInspector:
+    def __init__(self, threshold=None, slow_ms=None):
+        self.threshold = (
+            settings.QUERY_REPEAT_THRESHOLD if threshold is None
+            else threshold
+        )
+        self.slow_ms = settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.groups = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, params, (time.perf_counter() - start) * 1000)
+
+    def record(self, sql, params, duration):
+        if duration >= self.slow_ms:
+            logger.warning(
+                'Медленный запрос (%.1f мс): %s; параметры: %r\n%s',
+                duration, sql, params, ''.join(get_project_stack())
+            )
+        if IGNORED.match(sql):
+            return
+        shape = normalize(sql)
+        group = self.groups.setdefault(
+            shape, {'count': 0, 'duration': 0.0, 'stack': None}
+        )
+        group['count'] += 1
+        group['duration'] += duration
+        if group['count'] == 2:
+            group['stack'] = get_project_stack()
+
+    def repeated(self):
+        """Группы N+1: форма запроса, число повторов, время, стек."""
+        return sorted(
+            (
+                (shape, group['count'], group['duration'], group['stack'])
+                for shape, group in self.groups.items()
+                if group['count'] >= self.threshold
+            ),
+            key=lambda item: -item[1]
+        )
+
+    def report(self, label, raise_errors=False):
+        repeated = self.repeated()
+        for shape, count, duration, stack in repeated:
+            logger.warning(
+                'N+1 в %s: %d запросов (%.1f мс): %s\n%s',
+                label, count, duration, shape, ''.join(stack or ())
+            )
+        if repeated and raise_errors:
+            raise QueryInspectionError('\n'.join(
+                f'{label}: {count} запросов вида {shape}\n'
+                + ''.join(stack or ())
+                for shape, count, _, stack in repeated
+            ))
+
+
+@contextmanager
+def inspect_queries(label='блок', threshold=None, slow_ms=None,
+                    raise_errors=True):
+    """Проверяет запросы блока; по умолчанию N+1 роняет тест."""
+    inspector = QueryInspector(threshold, slow_ms)
+    with connection.execute_wrapper(inspector):
+        yield inspector
+    inspector.report(label, raise_errors)
+
+
+class QueryInspectionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries(
+            f'{request.method} {request.get_full_path()}',
+            raise_errors=settings.QUERY_INSPECTION_RAISE
+        ):
+            return self.get_response(request)
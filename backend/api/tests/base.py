@@ -0,0 +1,120 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import caches
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from api import authentication
+from apps.foodgram.models import Ingredient, Recipe, RecipeIngredient, Tag
+from apps.foodgram.recipe_index import recipe_index
+from apps.users.models import User
+
+
+def make_image(size=(400, 300)):
+    """Картинка PNG в формате data URI, как её присылает фронтенд."""
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class FoodgramTestCase(APITestCase):
+    """Пользователи, токен, теги и ингредиенты; кэши очищены.
+
+    Загруженные картинки сохраняются во временный каталог, а миниатюры
+    строятся в текущем потоке.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        # Миниатюры строятся сразу после фиксации, без пула потоков.
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root, IMAGE_WORKERS=0
+        )
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        authentication.clear()
+        # Журнал изменений индекса лежал в очищенном кэше.
+        recipe_index.invalidate()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='Иван', last_name='Иванов'
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Пётр', last_name='Петров'
+        )
+        self.client = APIClient()
+        self.auth_client = APIClient()
+        self.auth_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        self.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(3)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(10)
+        ]
+
+    def create_recipe(self, name='Рецепт', ingredients=3, author=None):
+        recipe = Recipe.objects.create(
+            author=author or self.author, name=name, text='Описание',
+            cooking_time=10, image='recipes/image.png',
+            renditions_source='recipes/image.png'
+        )
+        recipe.tags.set(self.tags[:2])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=number + 1
+            )
+            for number, ingredient in enumerate(
+                self.ingredients[:ingredients]
+            )
+        )
+        return recipe
+
+    def download_shopping_cart(self):
+        response = self.auth_client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def recipe_data(self, count=3, **fields):
+        """Тело запроса на создание рецепта."""
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+            'image': make_image(),
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': number + 1}
+                for number, ingredient in enumerate(
+                    self.ingredients[:count]
+                )
+            ],
+            **fields
+        }
@@ -0,0 +1,76 @@
+"""Кэш аутентификации по токену и его сброс."""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import authentication
+from apps.foodgram.versions import TOKEN_VERSION_KEY
+
+from .base import FoodgramTestCase
+
+
+# В тестах кэши в памяти процесса, поэтому кэш токенов включается явно,
+# как с общим кэшем.
+@override_settings(TOKEN_CACHE_TTL=300)
+class CachedTokenAuthenticationTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.key = Token.objects.get(user=self.user).key
+
+    def get_me(self):
+        return self.auth_client.get('/api/users/me/')
+
+    def test_cached_after_first_request(self):
+        self.get_me()
+        backend = authentication.CachedTokenAuthentication()
+        with self.assertNumQueries(0):
+            user, _ = backend.authenticate_credentials(self.key)
+        self.assertEqual(user, self.user)
+
+    def test_unknown_token_leaves_no_version(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token unknown')
+        self.assertEqual(client.get('/api/users/me/').status_code, 401)
+        self.assertIsNone(cache.get(TOKEN_VERSION_KEY.format('unknown')))
+
+    def test_logout(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_client.post('/api/auth/token/logout/')
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_deactivation(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get_me().status_code, 401)
+
+    @override_settings(TOKEN_CACHE_ALIAS='responses')
+    def test_shared_alias_keeps_versions(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assertIsNotNone(
+            caches['responses'].get(TOKEN_VERSION_KEY.format(self.key))
+        )
+        self.assertIsNone(cache.get(TOKEN_VERSION_KEY.format(self.key)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get_me().status_code, 401)
+
+
+class ProcessLocalCacheTests(FoodgramTestCase):
+    def test_disabled_by_default(self):
+        self.assertEqual(settings.TOKEN_CACHE_TTL, 0)
+        key = Token.objects.get(user=self.user).key
+        backend = authentication.CachedTokenAuthentication()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                user, _ = backend.authenticate_credentials(key)
+            self.assertEqual(user, self.user)
+        self.assertIsNone(cache.get(TOKEN_VERSION_KEY.format(key)))
+        self.assertEqual(
+            self.auth_client.get('/api/users/me/').status_code, 200
+        )
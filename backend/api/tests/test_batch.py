@@ -0,0 +1,85 @@
+"""Пакетное добавление в избранное и список покупок и удаление."""
+from django.conf import settings
+
+from apps.foodgram.models import Cart, CartIngredient, Favorite
+
+from .base import FoodgramTestCase
+
+ENDPOINTS = {
+    '/api/recipes/favorite/': Favorite,
+    '/api/recipes/shopping_cart/': Cart,
+}
+UNKNOWN = 10 ** 6
+
+
+class BatchTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = [self.create_recipe(ingredients=2) for _ in range(3)]
+        self.ids = [recipe.pk for recipe in self.recipes]
+
+    def send(self, method, url, ids):
+        response = getattr(self.auth_client, method)(
+            url, {'recipes': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return [
+            (item['id'], item['status'])
+            for item in response.json()['results']
+        ]
+
+    def test_add(self):
+        for url, model in ENDPOINTS.items():
+            with self.subTest(url=url):
+                self.send('post', url, self.ids[:1])
+                self.assertEqual(
+                    self.send('post', url, [*self.ids, UNKNOWN, self.ids[1]]),
+                    [(self.ids[0], 'exists'), (self.ids[1], 'added'),
+                     (self.ids[2], 'added'), (UNKNOWN, 'not_found')]
+                )
+                self.assertEqual(
+                    set(model.objects.filter(user=self.user).values_list(
+                        'recipe_id', flat=True
+                    )),
+                    set(self.ids)
+                )
+
+    def test_remove(self):
+        for url, model in ENDPOINTS.items():
+            with self.subTest(url=url):
+                self.send('post', url, self.ids[:2])
+                self.assertEqual(
+                    self.send('delete', url, [self.ids[1], self.ids[2]]),
+                    [(self.ids[1], 'removed'), (self.ids[2], 'not_found')]
+                )
+                self.assertEqual(
+                    list(model.objects.values_list('recipe_id', flat=True)),
+                    [self.ids[0]]
+                )
+
+    def test_cart_totals(self):
+        url = '/api/recipes/shopping_cart/'
+        self.send('post', url, self.ids)
+        self.assertEqual(
+            dict(CartIngredient.objects.values_list(
+                'ingredient_id', 'amount'
+            )),
+            {self.ingredients[0].pk: 3, self.ingredients[1].pk: 6}
+        )
+        self.send('delete', url, self.ids[:2])
+        self.assertEqual(
+            dict(CartIngredient.objects.values_list(
+                'ingredient_id', 'amount'
+            )),
+            {self.ingredients[0].pk: 1, self.ingredients[1].pk: 2}
+        )
+
+    def test_invalid(self):
+        url = '/api/recipes/favorite/'
+        too_many = list(range(1, settings.RECIPE_BATCH_LIMIT + 2))
+        for data in ({}, {'recipes': []}, {'recipes': ['x']},
+                     {'recipes': [0]}, {'recipes': too_many}):
+            with self.subTest(data=data):
+                response = self.auth_client.post(url, data, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(url).status_code, 401)
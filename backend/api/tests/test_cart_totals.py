@@ -0,0 +1,86 @@
+"""Итоги списков покупок и сброс закэшированного PDF."""
+from io import StringIO
+
+from django.core.management import call_command
+
+from apps.foodgram import cart_totals
+from apps.foodgram.models import Cart, CartIngredient
+
+from .base import FoodgramTestCase
+
+
+class CartTotalsTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        # Ингредиенты 0-2 у первого рецепта, 0-4 у второго.
+        self.first = self.create_recipe('Первый', ingredients=3)
+        self.second = self.create_recipe('Второй', ingredients=5)
+
+    def totals(self):
+        return dict(CartIngredient.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+
+    def expected(self):
+        return {
+            ingredient_id: amount
+            for (user_id, ingredient_id), amount
+            in cart_totals.calculate_totals([self.user.pk]).items()
+        }
+
+    def cart(self, method, recipe):
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.auth_client, method)(url)
+
+    def test_add_and_remove(self):
+        self.assertEqual(self.cart('post', self.first).status_code, 201)
+        self.assertEqual(self.cart('post', self.second).status_code, 201)
+        self.assertEqual(self.totals(), self.expected())
+        self.assertEqual(self.totals()[self.ingredients[0].id], 2)
+        self.assertEqual(self.cart('delete', self.first).status_code, 204)
+        self.assertEqual(self.totals(), self.expected())
+        self.cart('delete', self.second)
+        self.assertEqual(self.totals(), {})
+
+    def test_recipe_edit_updates_carts(self):
+        Cart.objects.create(user=self.user, recipe=self.first)
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f'/api/recipes/{self.first.id}/',
+            {
+                'name': self.first.name, 'text': self.first.text,
+                'cooking_time': self.first.cooking_time,
+                'tags': [tag.id for tag in self.tags[:2]],
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 10},
+                    {'id': self.ingredients[5].id, 'amount': 3},
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.totals(), {
+            self.ingredients[0].id: 10, self.ingredients[5].id: 3
+        })
+
+    def test_pdf_version_bumped_on_commit(self):
+        self.cart('post', self.first)
+        pdf = self.download_shopping_cart()
+        self.assertEqual(self.download_shopping_cart(), pdf)
+        with self.captureOnCommitCallbacks() as callbacks:
+            cart_totals.add_recipes(self.user.pk, [self.second.pk])
+        # До фиксации транзакции отдаётся прежний PDF.
+        self.assertEqual(self.download_shopping_cart(), pdf)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.download_shopping_cart(), pdf)
+
+    def test_full_rebuild(self):
+        self.cart('post', self.first)
+        pdf = self.download_shopping_cart()
+        CartIngredient.objects.filter(user=self.user).update(amount=99)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_shopping_carts', stdout=StringIO())
+        self.assertEqual(self.totals(), self.expected())
+        self.assertNotEqual(self.download_shopping_cart(), pdf)
@@ -0,0 +1,89 @@
+"""Условные GET справочников тегов и ингредиентов."""
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from apps.foodgram.models import Ingredient
+
+from .base import FoodgramTestCase
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+    },
+}
+
+
+class CatalogueTests(FoodgramTestCase):
+    def test_not_modified(self):
+        for url in ('/api/tags/', '/api/ingredients/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+                etag = response['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_cached_body(self):
+        response = self.client.get('/api/tags/')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get('/api/tags/').content, response.content
+            )
+
+    def test_new_version_after_commit(self):
+        etag = self.client.get('/api/ingredients/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Ingredient.objects.create(name='Соль', measurement_unit='г')
+            # До фиксации транзакции версия справочника прежняя.
+            response = self.client.get(
+                '/api/ingredients/', HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 304)
+        self.assertTrue(callbacks)
+        response = self.client.get(
+            '/api/ingredients/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Соль', [item['name'] for item in response.json()])
+        self.assertIn('Last-Modified', response)
+
+    def test_tag_change(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags[0].name = 'Завтрак'
+            self.tags[0].save()
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Завтрак', [item['name'] for item in response.json()])
+
+
+class UploadWarningTests(FoodgramTestCase):
+    def upload(self):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.json', encoding='UTF-8'
+        ) as file:
+            json.dump([{'name': 'Соль', 'measurement_unit': 'г'}], file)
+            file.flush()
+            stderr = StringIO()
+            call_command(
+                'upload_recipes', file.name, stdout=StringIO(), stderr=stderr
+            )
+        return stderr.getvalue()
+
+    def test_process_local_cache(self):
+        self.assertIn('памяти процесса', self.upload())
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_shared_cache(self):
+        self.assertEqual(self.upload(), '')
@@ -0,0 +1,56 @@
+"""Денормализованные счётчики рецептов и пользователей."""
+from io import StringIO
+
+from django.core.management import call_command
+
+from apps.foodgram.models import Cart, Favorite, RecipeStats
+from apps.users.models import Follow, UserStats
+
+from .base import FoodgramTestCase
+
+
+class CounterTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe()
+
+    def recipe_counts(self):
+        stats = RecipeStats.objects.get(recipe=self.recipe)
+        return stats.favorites_count, stats.carts_count
+
+    def user_counts(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.recipes_count, stats.followers_count
+
+    def test_recipe_counters(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        Cart.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(self.recipe_counts(), (2, 1))
+        Favorite.objects.filter(user=self.user).delete()
+        Cart.objects.all().delete()
+        self.assertEqual(self.recipe_counts(), (1, 0))
+
+    def test_user_counters(self):
+        self.create_recipe(author=self.author)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.user_counts(self.author), (2, 1))
+        follow.delete()
+        self.recipe.delete()
+        self.assertEqual(self.user_counts(self.author), (1, 0))
+
+    def test_api_reads_counters(self):
+        self.auth_client.post(f'/api/users/{self.author.pk}/subscribe/')
+        UserStats.objects.filter(user=self.author).update(recipes_count=7)
+        response = self.auth_client.get('/api/users/subscriptions/')
+        self.assertEqual(response.json()['results'][0]['recipes_count'], 7)
+
+    def test_reconcile(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Follow.objects.create(user=self.user, author=self.author)
+        RecipeStats.objects.update(favorites_count=5, carts_count=3)
+        UserStats.objects.all().delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.recipe_counts(), (1, 0))
+        self.assertEqual(self.user_counts(self.author), (1, 1))
+        self.assertEqual(self.user_counts(self.user), (0, 0))
@@ -0,0 +1,58 @@
+"""Миниатюры картинок рецептов."""
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image
+
+from apps.foodgram.images import RENDITIONS, rendition_name
+from apps.foodgram.models import Recipe
+
+from .base import FoodgramTestCase, make_image
+
+
+class RenditionTests(FoodgramTestCase):
+    def create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.auth_client.post(
+                '/api/recipes/', self.recipe_data(), format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        return Recipe.objects.get(pk=response.json()['id'])
+
+    def path(self, image_name, rendition):
+        return Path(settings.MEDIA_ROOT, rendition_name(image_name, rendition))
+
+    def test_renditions_built(self):
+        recipe = self.create()
+        self.assertEqual(recipe.renditions_source, recipe.image.name)
+        for rendition, size in RENDITIONS.items():
+            with Image.open(self.path(recipe.image.name, rendition)) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertLessEqual(image.width, size[0])
+        images = self.client.get(f'/api/recipes/{recipe.pk}/').json()['images']
+        self.assertTrue(images['medium'].endswith('_medium.webp'))
+        item = self.client.get('/api/recipes/').json()['results'][0]
+        self.assertEqual(item['image'], images['thumbnail'])
+
+    def test_original_until_ready(self):
+        response = self.auth_client.post(
+            '/api/recipes/', self.recipe_data(), format='json'
+        )
+        images = response.json()['images']
+        self.assertEqual(images['thumbnail'], images['original'])
+
+    def test_replaced_image(self):
+        recipe = self.create()
+        old_name = recipe.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.auth_client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                self.recipe_data(image=make_image((200, 200))), format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        recipe.refresh_from_db()
+        self.assertNotEqual(recipe.image.name, old_name)
+        self.assertEqual(recipe.renditions_source, recipe.image.name)
+        for rendition in RENDITIONS:
+            self.assertFalse(self.path(old_name, rendition).exists())
+            self.assertTrue(self.path(recipe.image.name, rendition).exists())
@@ -0,0 +1,45 @@
+"""Поиск ингредиентов по префиксу названия."""
+from django.test import override_settings
+
+from apps.foodgram.models import Ingredient
+
+from .base import FoodgramTestCase
+
+
+class IngredientSearchTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ('Ёжевика', 'Ежевичный джем', 'Молоко', 'молоко топлёное'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def search(self, name):
+        response = self.client.get('/api/ingredients/', {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()]
+
+    def test_prefix_ignores_case_and_yo(self):
+        self.assertEqual(self.search('МОЛ'), ['Молоко', 'молоко топлёное'])
+        self.assertEqual(self.search('еж'), ['Ёжевика', 'Ежевичный джем'])
+        self.assertEqual(self.search('ежевич'), ['Ежевичный джем'])
+
+    def test_not_found(self):
+        self.assertEqual(self.search('сыр'), [])
+
+    def test_served_without_queries(self):
+        self.search('мол')
+        with self.assertNumQueries(0):
+            self.search('мол')
+
+    @override_settings(INGREDIENT_SEARCH_LIMIT=2)
+    def test_limit(self):
+        self.assertEqual(len(self.search('ингредиент')), 2)
+
+    def test_index_rebuilt_after_change(self):
+        self.search('мол')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='Молоко сгущённое',
+                                      measurement_unit='г')
+        self.assertIn('Молоко сгущённое', self.search('мол'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(name='Молоко').get().delete()
+        self.assertNotIn('Молоко', self.search('мол'))
@@ -0,0 +1,63 @@
+"""Получение нескольких рецептов по списку id."""
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.foodgram.models import Favorite
+from apps.foodgram.versions import RECIPES_CACHE_ALIAS
+
+from .base import FoodgramTestCase
+from .test_queries import RECIPE_DETAIL_QUERIES
+
+UNKNOWN = 10 ** 6
+
+
+class MultiGetTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = [
+            self.create_recipe(f'Рецепт {number}') for number in range(3)
+        ]
+        self.ids = [recipe.pk for recipe in self.recipes]
+
+    def get(self, client, ids):
+        return client.get('/api/recipes/', {
+            'ids': ','.join(str(pk) for pk in ids)
+        })
+
+    def test_request_order_and_missing(self):
+        ids = [self.ids[2], UNKNOWN, self.ids[0], self.ids[2]]
+        response = self.get(self.client, ids)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [item['id'] for item in data['results']],
+            [self.ids[2], self.ids[0]]
+        )
+        self.assertEqual(data['missing'], [UNKNOWN])
+        # Полные представления, как у /api/recipes/{id}/.
+        self.assertEqual(
+            data['results'][1],
+            self.client.get(f'/api/recipes/{self.ids[0]}/').json()
+        )
+
+    def test_user_fields(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[1])
+        results = self.get(self.auth_client, self.ids).json()['results']
+        self.assertEqual(
+            [item['is_favorited'] for item in results], [False, True, False]
+        )
+
+    def test_queries_do_not_grow(self):
+        for ids in (self.ids[:1], self.ids):
+            with self.subTest(count=len(ids)):
+                caches[RECIPES_CACHE_ALIAS].clear()
+                with self.assertNumQueries(RECIPE_DETAIL_QUERIES):
+                    self.get(self.client, ids)
+
+    def test_invalid(self):
+        too_many = range(1, settings.RECIPE_MULTI_GET_LIMIT + 2)
+        for ids in ('1,x', ','.join(map(str, too_many))):
+            with self.subTest(ids=ids[:10]):
+                response = self.client.get('/api/recipes/', {'ids': ids})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ids', response.json())
@@ -0,0 +1,73 @@
+"""Постраничный вывод рецептов по номеру страницы и по курсору."""
+from urllib.parse import parse_qs, urlparse
+
+from .base import FoodgramTestCase
+
+RECIPES = 5
+
+
+class PaginationTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        # Индекс поиска обновляется после фиксации транзакции.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes = [
+                self.create_recipe(
+                    f'Рецепт {number}', ingredients=number % 3 + 1
+                )
+                for number in range(RECIPES)
+            ]
+
+    def get(self, params):
+        return self.client.get('/api/recipes/', params)
+
+    def test_page_number(self):
+        data = self.get({'limit': 2, 'page': 2}).json()
+        self.assertEqual(data['count'], RECIPES)
+        self.assertEqual(
+            [item['id'] for item in data['results']],
+            [recipe.id for recipe in self.recipes[::-1][2:4]]
+        )
+
+    def test_cursor_walks_all_recipes(self):
+        params = {'limit': 2, 'pagination': 'cursor'}
+        ids = []
+        while True:
+            response = self.get(params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('count', data)
+            ids.extend(item['id'] for item in data['results'])
+            if not data['next']:
+                break
+            params = {
+                key: values[0] for key, values in parse_qs(
+                    urlparse(data['next']).query
+                ).items()
+            }
+            self.assertIn('cursor', params)
+        self.assertEqual(ids, [recipe.id for recipe in self.recipes[::-1]])
+
+    def test_cursor_with_filters(self):
+        response = self.get({
+            'pagination': 'cursor',
+            'ingredients': self.ingredients[2].id
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [self.recipes[2].id]
+        )
+
+    def test_cursor_refused_for_ranked_lists(self):
+        for params in (
+            {'search': 'рецепт'},
+            {'ingredients': self.ingredients[0].id, 'missing': 1},
+        ):
+            with self.subTest(params=params):
+                response = self.get(params)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()['results'])
+                response = self.get({**params, 'pagination': 'cursor'})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('pagination', response.json())
@@ -0,0 +1,93 @@
+"""Число SQL-запросов основных списков не зависит от размера страницы."""
+from django.core.cache import caches
+
+from api import authentication
+from apps.foodgram.models import Cart, Favorite
+from apps.users.models import Follow, User
+
+from .base import FoodgramTestCase
+
+PAGE_SIZES = (1, 5)
+# Количество рецептов, пользователи, теги, ингредиенты, автор.
+RECIPES_LIST_QUERIES = 6
+# Плюс токен, избранное, корзина и подписки пользователя.
+RECIPES_LIST_AUTH_QUERIES = 10
+RECIPE_DETAIL_QUERIES = 4
+RECIPE_DETAIL_AUTH_QUERIES = 8
+USERS_LIST_QUERIES = 2
+USERS_LIST_AUTH_QUERIES = 3
+
+
+class QueryCountTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = []
+        for number in range(max(PAGE_SIZES) + 1):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='password'
+            )
+            recipe = self.create_recipe(f'Рецепт {number}', author=author)
+            self.recipes.append(recipe)
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            Cart.objects.create(user=self.user, recipe=recipe)
+            Follow.objects.create(user=self.user, author=author)
+
+    def assert_queries(self, client, url, expected):
+        # Кэши ответов и токенов очищаются, чтобы мерить холодный запрос.
+        for cache in caches.all():
+            cache.clear()
+        authentication.clear()
+        with self.assertNumQueries(expected):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipes_list(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                response = self.assert_queries(
+                    self.client, f'/api/recipes/?limit={limit}',
+                    RECIPES_LIST_QUERIES
+                )
+                self.assertEqual(len(response.json()['results']), limit)
+
+    def test_recipes_list_authenticated(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                response = self.assert_queries(
+                    self.auth_client, f'/api/recipes/?limit={limit}',
+                    RECIPES_LIST_AUTH_QUERIES
+                )
+                results = response.data['results']
+                self.assertEqual(len(results), limit)
+                for recipe in results:
+                    self.assertTrue(recipe['is_favorited'])
+                    self.assertTrue(recipe['is_in_shopping_cart'])
+                    self.assertTrue(recipe['author']['is_subscribed'])
+
+    def test_recipe_detail(self):
+        for ingredients in (1, 5):
+            recipe = self.create_recipe(ingredients=ingredients)
+            url = f'/api/recipes/{recipe.id}/'
+            with self.subTest(ingredients=ingredients):
+                self.assert_queries(self.client, url, RECIPE_DETAIL_QUERIES)
+                response = self.assert_queries(
+                    self.auth_client, url, RECIPE_DETAIL_AUTH_QUERIES
+                )
+                self.assertEqual(
+                    len(response.data['ingredients']), ingredients
+                )
+
+    def test_users_list(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                response = self.assert_queries(
+                    self.client, f'/api/users/?limit={limit}',
+                    USERS_LIST_QUERIES
+                )
+                self.assertEqual(len(response.data['results']), limit)
+                self.assert_queries(
+                    self.auth_client, f'/api/users/?limit={limit}',
+                    USERS_LIST_AUTH_QUERIES
+                )
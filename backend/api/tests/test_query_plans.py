@@ -0,0 +1,66 @@
+"""Пробы избранного, корзины и тегов читают уникальные индексы.
+
+Планы проверяются на PostgreSQL. На маленькой тестовой базе
+планировщику дешевле последовательное чтение, поэтому оно
+отключается: если подходящего индекса нет, в плане останется Seq Scan.
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from apps.foodgram.management.commands import explain_queries
+from apps.foodgram.models import Cart, Favorite, Recipe, RecipeIngredient
+
+from .base import FoodgramTestCase
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN для PostgreSQL')
+class QueryPlanTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(3):
+            recipe = self.create_recipe(f'Рецепт {number}')
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            Cart.objects.create(user=self.user, recipe=recipe)
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return explain_queries.postgres_plan(
+                cursor, *queryset.query.sql_with_params()
+            )
+
+    def assert_index(self, steps, table, index=None):
+        used = [
+            step for step in steps
+            if step.split(' using ')[0].endswith(f' {table}')
+        ]
+        self.assertTrue(used, f'{table} не читается: {steps}')
+        for step in used:
+            self.assertNotIn('seq scan', step)
+            if index is not None:
+                self.assertTrue(step.endswith(f'using {index}'), steps)
+
+    def test_user_flags(self):
+        steps = self.explain(
+            explain_queries.Command().recipe_list(self.user)
+        )
+        self.assert_index(steps, 'foodgram_favorite', 'unique favorite')
+        self.assert_index(steps, 'foodgram_cart', 'unique cart')
+
+    def test_recipe_ingredient_probe(self):
+        steps = self.explain(Recipe.objects.filter(Exists(
+            RecipeIngredient.objects.filter(
+                recipe=OuterRef('pk'), ingredient=self.ingredients[0]
+            )
+        )))
+        self.assert_index(
+            steps, 'foodgram_recipeingredient', 'unique recipe ingredient'
+        )
+
+    def test_tag_filter(self):
+        steps = self.explain(explain_queries.Command().recipe_list(
+            self.user, {'tags': self.tags[0].slug}
+        ))
+        self.assert_index(steps, 'foodgram_recipe_tags')
@@ -0,0 +1,69 @@
+"""Создание рецепта: проверка и запись ингредиентов пачкой."""
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.foodgram.models import Recipe
+
+from .base import FoodgramTestCase
+
+
+class RecipeCreateTests(FoodgramTestCase):
+    def post(self, data):
+        return self.auth_client.post('/api/recipes/', data, format='json')
+
+    def test_create(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(self.recipe_data(count=5))
+        self.assertEqual(response.status_code, 201, response.data)
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        self.assertEqual(recipe.author, self.user)
+        self.assertEqual(
+            dict(recipe.recipe_ingredients.values_list(
+                'ingredient_id', 'amount'
+            )),
+            {ingredient.id: number + 1
+             for number, ingredient in enumerate(self.ingredients[:5])}
+        )
+        self.assertEqual(len(response.data['ingredients']), 5)
+        # Ингредиенты проверяются и записываются одним запросом каждое.
+        statements = [query['sql'] for query in context]
+        self.assertEqual(len([
+            sql for sql in statements
+            if sql.startswith('INSERT INTO "foodgram_recipeingredient"')
+        ]), 1)
+        self.assertEqual(len([
+            sql for sql in statements
+            if sql.startswith('SELECT "foodgram_ingredient"."id"')
+        ]), 1)
+
+    def test_max_amount(self):
+        data = self.recipe_data(count=1)
+        data['ingredients'][0]['amount'] = (
+            settings.MAX_VALUE_TO_SMALL_INT_FIELD
+        )
+        self.assertEqual(self.post(data).status_code, 201)
+
+    def test_invalid_ingredients(self):
+        first = self.ingredients[0].id
+        cases = {
+            'пусто': [],
+            'повтор': [
+                {'id': first, 'amount': 1}, {'id': first, 'amount': 2}
+            ],
+            'нет такого': [{'id': 10 ** 6, 'amount': 1}],
+            'ноль': [{'id': first, 'amount': 0}],
+            'не число': [{'id': first, 'amount': 'много'}],
+            'больше предела': [{
+                'id': first,
+                'amount': settings.MAX_VALUE_TO_SMALL_INT_FIELD + 1
+            }],
+        }
+        for case, ingredients in cases.items():
+            with self.subTest(case):
+                response = self.post(
+                    self.recipe_data(ingredients=ingredients)
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ingredients', response.data)
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,88 @@
+"""Фильтр рецептов по ингредиентам: все сразу и «не хватает не больше n»."""
+from django.test import override_settings
+
+from apps.foodgram.models import Recipe, RecipeIngredient
+from apps.foodgram.recipe_index import recipe_index
+
+from .base import FoodgramTestCase
+
+
+class IngredientFilterTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes = [
+                self.create_with((0, 1, 2)),
+                self.create_with((0, 1)),
+                self.create_with((0, 3, 4, 5)),
+                self.create_with((6,)),
+            ]
+
+    def create_with(self, numbers):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/image.png',
+            renditions_source='recipes/image.png'
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=self.ingredients[number], amount=1
+            )
+            for number in numbers
+        )
+        # bulk_create не вызывает сигналов: журнал индекса пишется явно,
+        # как после сохранения рецепта через API.
+        recipe.save()
+        return recipe
+
+    def filter(self, numbers, missing=None):
+        params = {
+            'ingredients': ','.join(
+                str(self.ingredients[number].id) for number in numbers
+            )
+        }
+        if missing is not None:
+            params['missing'] = missing
+        response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            self.recipes.index(Recipe.objects.get(pk=item['id']))
+            for item in response.json()['results']
+        ]
+
+    def test_all_ingredients(self):
+        self.assertEqual(self.filter((0, 1)), [1, 0])
+        self.assertEqual(self.filter((0, 0, 1)), [1, 0])
+        self.assertEqual(self.filter((0, 6)), [])
+        self.assertEqual(self.filter((6,)), [3])
+
+    def test_missing(self):
+        self.assertEqual(self.filter((0, 1), missing=0), [1])
+        self.assertEqual(self.filter((0, 1), missing=1), [1, 0])
+        self.assertEqual(self.filter((0, 1), missing=3), [1, 0, 2])
+        self.assertEqual(self.filter((7,), missing=3), [])
+
+    def test_missing_follows_changes(self):
+        self.assertEqual(self.filter((0, 1), missing=0), [1])
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(
+                recipe=self.recipes[0], ingredient=self.ingredients[2]
+            ).delete()
+            self.recipes[0].save()
+        self.assertEqual(self.filter((0, 1), missing=0), [1, 0])
+
+    def test_missing_too_large(self):
+        response = self.client.get('/api/recipes/', {
+            'ingredients': self.ingredients[0].id, 'missing': 100
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(RECIPE_INDEX_MAX_RECIPES=3)
+class IngredientFilterWithoutIndexTests(IngredientFilterTests):
+    """Рецептов больше лимита: подбор выполняется запросом к базе."""
+
+    def test_index_disabled(self):
+        self.assertIsNone(
+            recipe_index.missing_at_most({self.ingredients[0].id}, 0)
+        )
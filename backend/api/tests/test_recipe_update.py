@@ -0,0 +1,77 @@
+"""Правка рецепта записывает в базу только изменившиеся строки."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.foodgram.models import RecipeIngredient
+
+from .base import FoodgramTestCase
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class RecipeUpdateWritesTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe(author=self.user)
+        self.data = {
+            'name': self.recipe.name,
+            'text': self.recipe.text,
+            'cooking_time': self.recipe.cooking_time,
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': self.ingredients_data(3),
+        }
+
+    def ingredients_data(self, count, **amounts):
+        return [
+            {
+                'id': ingredient.id,
+                'amount': amounts.get(f'amount{number}', number + 1)
+            }
+            for number, ingredient in enumerate(self.ingredients[:count])
+        ]
+
+    def patch(self, **changes):
+        """Статементы записи (первое слово SQL) при правке рецепта."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.auth_client.patch(
+                f'/api/recipes/{self.recipe.id}/', {**self.data, **changes},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        return [
+            query['sql'].split(None, 1)[0] for query in context
+            if query['sql'].startswith(WRITES)
+        ]
+
+    def test_text_only(self):
+        self.assertEqual(self.patch(text='Исправленное описание'), ['UPDATE'])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.text, 'Исправленное описание')
+
+    def test_amount_changed(self):
+        writes = self.patch(ingredients=self.ingredients_data(3, amount0=10))
+        self.assertEqual(writes, ['UPDATE', 'UPDATE'])
+        self.assertEqual(
+            RecipeIngredient.objects.get(
+                recipe=self.recipe, ingredient=self.ingredients[0]
+            ).amount,
+            10
+        )
+
+    def test_ingredient_added(self):
+        writes = self.patch(ingredients=self.ingredients_data(4))
+        self.assertEqual(writes, ['INSERT', 'UPDATE'])
+        self.assertEqual(self.recipe.recipe_ingredients.count(), 4)
+
+    def test_ingredient_removed(self):
+        writes = self.patch(ingredients=self.ingredients_data(2))
+        self.assertEqual(writes, ['DELETE', 'UPDATE'])
+        self.assertEqual(self.recipe.recipe_ingredients.count(), 2)
+
+    def test_tag_swap(self):
+        writes = self.patch(tags=[self.tags[0].id, self.tags[2].id])
+        self.assertEqual(writes, ['DELETE', 'INSERT', 'UPDATE'])
+        self.assertEqual(
+            set(self.recipe.tags.values_list('id', flat=True)),
+            {self.tags[0].id, self.tags[2].id}
+        )
@@ -0,0 +1,90 @@
+"""Кэш анонимных ответов сбрасывается версиями из того же кэша."""
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.foodgram import response_cache
+from apps.foodgram.versions import (RECIPE_VERSION_KEY, RECIPES_CACHE_ALIAS,
+                                    RECIPES_EPOCH_KEY, RECIPES_VERSION_KEY,
+                                    get_versions)
+from apps.users.models import User
+
+from .base import FoodgramTestCase
+
+
+class ResponseCacheTests(FoodgramTestCase):
+    def test_versions_live_with_responses(self):
+        recipe = self.create_recipe()
+        self.assertEqual(
+            self.client.get('/api/recipes/')['X-Cache'], 'MISS'
+        )
+        self.assertEqual(self.client.get('/api/recipes/')['X-Cache'], 'HIT')
+        self.assertIsNotNone(
+            caches[response_cache.CACHE_ALIAS].get(RECIPES_VERSION_KEY)
+        )
+        # Кэш default у другого процесса может быть своим: версия
+        # рецептов от него не зависит.
+        cache.clear()
+        self.assertEqual(self.client.get('/api/recipes/')['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Новое название'
+            recipe.save()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(
+            response.json()['results'][0]['name'], 'Новое название'
+        )
+
+    def test_miss_rendered_once(self):
+        self.create_recipe()
+        with mock.patch.object(
+            JSONRenderer, 'render', autospec=True,
+            side_effect=JSONRenderer.render
+        ) as render:
+            miss = self.client.get('/api/recipes/')
+        self.assertEqual(render.call_count, 1)
+        hit = self.client.get('/api/recipes/')
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(miss.content, hit.content)
+        self.assertEqual(self.client.get('/api/recipes/0/').status_code, 404)
+
+
+class AuthorChangeTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author_recipe = self.create_recipe()
+        self.other_recipe = self.create_recipe(author=self.user)
+
+    def versions(self):
+        return get_versions([
+            RECIPE_VERSION_KEY.format(self.author_recipe.pk),
+            RECIPE_VERSION_KEY.format(self.other_recipe.pk),
+            RECIPES_EPOCH_KEY
+        ], RECIPES_CACHE_ALIAS)
+
+    def test_rename_bumps_only_author_recipes(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Павел'
+            self.author.save()
+        after = self.versions()
+        key = RECIPE_VERSION_KEY.format(self.author_recipe.pk)
+        self.assertNotEqual(after.pop(key), before.pop(key))
+        self.assertEqual(after, before)
+        response = self.client.get(f'/api/recipes/{self.author_recipe.pk}/')
+        self.assertEqual(response.json()['author']['first_name'], 'Павел')
+
+    def test_other_saves_keep_versions(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            User.objects.create_user(
+                username='new', email='new@example.com', password='password'
+            )
+            self.author.last_login = timezone.now()
+            self.author.save(update_fields=['last_login'])
+            self.author.set_password('new-password')
+            self.author.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.versions(), before)
@@ -0,0 +1,64 @@
+"""Полнотекстовый поиск рецептов (на SQLite — через таблицу FTS5)."""
+from unittest import skipUnless
+
+from django.db import connection
+
+from apps.foodgram.models import Ingredient, RecipeIngredient
+
+from .base import FoodgramTestCase
+
+
+class SearchTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.basil = Ingredient.objects.create(
+            name='Базилик', measurement_unit='г'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup = self.create('Томатный суп', 'Варить час')
+            self.salad = self.create('Салат', 'Полить томатный соус')
+            self.omelette = self.create('Омлет', 'Взбить яйца')
+            RecipeIngredient.objects.create(
+                recipe=self.omelette, ingredient=self.basil, amount=5
+            )
+
+    def create(self, name, text):
+        recipe = self.create_recipe(name)
+        recipe.text = text
+        recipe.save()
+        return recipe
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_name_ranked_above_text(self):
+        self.assertEqual(
+            self.search('томатный'), [self.soup.pk, self.salad.pk]
+        )
+
+    def test_all_words_required(self):
+        self.assertEqual(self.search('томатный соус'), [self.salad.pk])
+        self.assertEqual(self.search('томатный омлет'), [])
+
+    def test_ingredients(self):
+        self.assertEqual(self.search('базилик'), [self.omelette.pk])
+
+    def test_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basil.name = 'Шпинат'
+            self.basil.save()
+            self.soup.name = 'Гороховый суп'
+            self.soup.save()
+        self.assertEqual(self.search('шпинат'), [self.omelette.pk])
+        self.assertEqual(self.search('базилик'), [])
+        self.assertEqual(self.search('томатный'), [self.salad.pk])
+
+    def test_blank_query_ignored(self):
+        self.assertEqual(len(self.search('  ')), 3)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Префиксы только в FTS5')
+    def test_sqlite_prefix(self):
+        self.assertEqual(self.search('омл'), [self.omelette.pk])
+        self.assertEqual(self.search('"омлет" OR салат*'), [])
@@ -0,0 +1,51 @@
+"""PDF списка покупок: перенос на новые страницы и кэш."""
+import re
+
+from apps.foodgram.models import Cart, Ingredient, RecipeIngredient
+
+from .base import FoodgramTestCase
+
+PAGE_RE = re.compile(rb'/Type /Page\b(?!s)')
+
+
+class ShoppingListTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe(ingredients=3)
+        Cart.objects.create(user=self.user, recipe=self.recipe)
+
+    def test_anonymous(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_pdf(self):
+        pdf = self.download_shopping_cart()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(len(PAGE_RE.findall(pdf)), 1)
+
+    def test_long_list_continues_on_next_pages(self):
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=self.recipe, ingredient=Ingredient.objects.create(
+                    name=f'Длинный ингредиент {number}',
+                    measurement_unit='г'
+                ),
+                amount=1
+            )
+            for number in range(100)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Cart.objects.filter(user=self.user).delete()
+            Cart.objects.create(user=self.user, recipe=self.recipe)
+        self.assertGreater(
+            len(PAGE_RE.findall(self.download_shopping_cart())), 2
+        )
+
+    def test_cached_until_ingredient_changes(self):
+        pdf = self.download_shopping_cart()
+        self.assertEqual(self.download_shopping_cart(), pdf)
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient = self.ingredients[0]
+            ingredient.name = 'Переименованный'
+            ingredient.save()
+        self.assertNotEqual(self.download_shopping_cart(), pdf)
@@ -0,0 +1,74 @@
+"""Список подписок: постоянное число запросов и recipes_limit."""
+from apps.users.models import Follow, User
+
+from .base import FoodgramTestCase
+
+# Токен, число подписок, страница подписок, рецепты всех авторов.
+SUBSCRIPTIONS_QUERIES = 4
+
+
+class SubscriptionsTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authors = []
+        for number in range(4):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='password'
+            )
+            for _ in range(number):
+                self.create_recipe(author=author)
+            self.authors.append(author)
+
+    def subscribe(self, authors):
+        Follow.objects.bulk_create(
+            Follow(user=self.user, author=author) for author in authors
+        )
+
+    def get(self, **params):
+        response = self.auth_client.get('/api/users/subscriptions/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_queries_do_not_grow(self):
+        for count in (1, 4):
+            with self.subTest(count=count):
+                Follow.objects.all().delete()
+                self.subscribe(self.authors[:count])
+                with self.assertNumQueries(SUBSCRIPTIONS_QUERIES):
+                    self.assertEqual(self.get()['count'], count)
+
+    def test_recipes_limit(self):
+        self.subscribe(self.authors)
+        results = {
+            item['id']: item for item in self.get(recipes_limit=2)['results']
+        }
+        for number, author in enumerate(self.authors):
+            item = results[author.pk]
+            self.assertTrue(item['is_subscribed'])
+            self.assertEqual(item['recipes_count'], number)
+            self.assertEqual(len(item['recipes']), min(number, 2))
+            ids = [recipe['id'] for recipe in item['recipes']]
+            self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_invalid_recipes_limit(self):
+        for value in ('x', '-1'):
+            with self.subTest(value=value):
+                response = self.auth_client.get(
+                    '/api/users/subscriptions/', {'recipes_limit': value}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes_limit', response.json())
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.authors[2].pk}/subscribe/'
+        response = self.auth_client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['recipes_count'], 2)
+        self.assertEqual(self.auth_client.post(url).status_code, 400)
+        self.assertEqual(self.auth_client.delete(url).status_code, 204)
+        self.assertEqual(self.auth_client.delete(url).status_code, 404)
+        response = self.auth_client.post(
+            f'/api/users/{self.user.pk}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 400)
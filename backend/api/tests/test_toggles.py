@@ -0,0 +1,77 @@
+"""Добавление в избранное и список покупок и удаление оттуда."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.foodgram.models import Cart, Favorite, RecipeStats
+
+from .base import FoodgramTestCase
+
+ENDPOINTS = {'favorite': Favorite, 'shopping_cart': Cart}
+
+
+class ToggleTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe()
+
+    def url(self, endpoint, pk=None):
+        return f'/api/recipes/{pk or self.recipe.pk}/{endpoint}/'
+
+    def test_add_is_idempotent(self):
+        for endpoint, model in ENDPOINTS.items():
+            with self.subTest(endpoint=endpoint):
+                response = self.auth_client.post(self.url(endpoint))
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.json()['id'], self.recipe.pk)
+                response = self.auth_client.post(self.url(endpoint))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    model.objects.filter(user=self.user).count(), 1
+                )
+        stats = RecipeStats.objects.get(recipe=self.recipe)
+        self.assertEqual((stats.favorites_count, stats.carts_count), (1, 1))
+
+    def test_remove(self):
+        for endpoint, model in ENDPOINTS.items():
+            with self.subTest(endpoint=endpoint):
+                self.auth_client.post(self.url(endpoint))
+                response = self.auth_client.delete(self.url(endpoint))
+                self.assertEqual(response.status_code, 204)
+                self.assertFalse(model.objects.exists())
+                response = self.auth_client.delete(self.url(endpoint))
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('errors', response.json())
+        stats = RecipeStats.objects.get(recipe=self.recipe)
+        self.assertEqual((stats.favorites_count, stats.carts_count), (0, 0))
+
+    def statements(self, method, endpoint):
+        # Без запроса токена и точек сохранения транзакции.
+        with CaptureQueriesContext(connection) as context:
+            method(self.url(endpoint))
+        return [
+            query['sql'].split()[0] for query in context.captured_queries
+            if 'authtoken_token' not in query['sql']
+            and 'SAVEPOINT' not in query['sql']
+        ]
+
+    def test_statements(self):
+        self.assertEqual(
+            self.statements(self.auth_client.delete, 'favorite'), ['DELETE']
+        )
+        self.assertEqual(
+            self.statements(self.auth_client.post, 'favorite')[:2],
+            ['SELECT', 'INSERT']
+        )
+
+    def test_unknown_recipe(self):
+        for endpoint in ENDPOINTS:
+            with self.subTest(endpoint=endpoint):
+                for method in (self.auth_client.post, self.auth_client.delete):
+                    response = method(self.url(endpoint, pk=10 ** 6))
+                    self.assertEqual(response.status_code, 404)
+
+    def test_anonymous(self):
+        for endpoint in ENDPOINTS:
+            with self.subTest(endpoint=endpoint):
+                response = self.client.post(self.url(endpoint))
+                self.assertEqual(response.status_code, 401)
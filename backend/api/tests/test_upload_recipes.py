@@ -0,0 +1,68 @@
+"""Импорт ингредиентов командой upload_recipes."""
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+
+from apps.foodgram.models import Ingredient
+
+from .base import FoodgramTestCase
+
+ROWS = [('Соль', 'г'), ('Сахар', 'г'), ('Молоко', 'мл')]
+# Чтение существующих ключей, два пакета вставки по два и SAVEPOINT /
+# RELEASE транзакции внутри тестовой.
+IMPORT_QUERIES = 5
+
+
+class UploadRecipesTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.tmp.name, name)
+        path.write_text(content, encoding='UTF-8')
+        return str(path)
+
+    def upload(self, *args):
+        stdout = StringIO()
+        call_command(
+            'upload_recipes', *args, stdout=stdout, stderr=StringIO()
+        )
+        return stdout.getvalue()
+
+    def names(self):
+        return set(Ingredient.objects.filter(
+            name__in=[name for name, _ in ROWS]
+        ).values_list('name', 'measurement_unit'))
+
+    def test_csv_is_idempotent(self):
+        path = self.write('data.csv', ''.join(
+            f'{name},{unit}\n' for name, unit in ROWS + ROWS[:1]
+        ))
+        with self.assertNumQueries(IMPORT_QUERIES):
+            output = self.upload(path, '--batch-size', '2')
+        self.assertIn('Добавлено: 3, пропущено: 1', output)
+        self.assertEqual(self.names(), set(ROWS))
+        self.assertIn('Добавлено: 0, пропущено: 4', self.upload(path))
+
+    def test_json(self):
+        path = self.write('data.json', json.dumps([
+            {'name': name, 'measurement_unit': unit} for name, unit in ROWS
+        ]))
+        self.assertIn('Добавлено: 3', self.upload(path))
+        self.assertEqual(self.names(), set(ROWS))
+
+    def test_dry_run(self):
+        path = self.write('data.txt', 'Соль,г\n')
+        output = self.upload(path, '--format', 'csv', '--dry-run')
+        self.assertIn('+ Соль (г)', output)
+        self.assertIn('Будет добавлено: 1', output)
+        self.assertEqual(self.names(), set())
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.upload(self.write('data.txt', 'Соль,г\n'))
@@ -1,7 +1,10 @@
 from django.urls import include, path
 
+from .profiling import metrics_view
+
 urlpatterns = [
     path('', include('api.foodgram.urls')),
     path('users/', include('api.users.urls')),
+    path('metrics/', metrics_view),
     path('auth/', include('djoser.urls.authtoken')),
 ]
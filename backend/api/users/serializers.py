@@ -1,8 +1,12 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from djoser.serializers import (UserCreateSerializer, UserSerializer,
                                 serializers)
 
+from api.foodgram.fields import RecipeImagesField
+from api.profiling import ProfiledSerializerMixin
 from apps.foodgram.models import Recipe
-from apps.users.models import Follow, User
+from apps.users.models import Follow, User, UserStats
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -25,7 +29,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         }
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(ProfiledSerializerMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -43,13 +47,15 @@ class CustomUserSerializer(UserSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return obj.following.filter(user=request.user).exists()
 
 
 class AuthorRecipeSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     name = serializers.ReadOnlyField()
-    image = serializers.ImageField()
+    image = RecipeImagesField(rendition='thumbnail')
     cooking_time = serializers.ReadOnlyField()
 
     class Meta:
@@ -57,7 +63,52 @@ class AuthorRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if not recipes_limit:
+        return None
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        recipes_limit = -1
+    if recipes_limit < 0:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Должно быть неотрицательным целым числом!'}
+        )
+    return recipes_limit
+
+
+def authors_recipes_queryset(author_ids, recipes_limit=None):
+    """Рецепты авторов: не больше recipes_limit на автора.
+
+    Ограничение на автора выполняется оконной функцией ROW_NUMBER,
+    разбитой по автору, во вложенном запросе.
+    """
+    recipes = Recipe.objects.filter(author_id__in=author_ids)
+    if recipes_limit is None:
+        return recipes
+    sql, params = recipes.annotate(recipe_rank=Window(
+        expression=RowNumber(),
+        partition_by=[F('author_id')],
+        order_by=F('id').desc()
+    )).order_by().query.sql_with_params()
+    return Recipe.objects.raw(
+        f'SELECT * FROM ({sql}) ranked_recipes '
+        'WHERE recipe_rank <= %s ORDER BY id DESC',
+        (*params, recipes_limit)
+    )
+
+
+def get_authors_recipes(author_ids, recipes_limit=None):
+    """Рецепты авторов одним запросом, сгруппированные по автору."""
+    authors_recipes = {author_id: [] for author_id in author_ids}
+    for recipe in authors_recipes_queryset(author_ids, recipes_limit):
+        authors_recipes[recipe.author_id].append(recipe)
+    return authors_recipes
+
+
+class SubscribeSerializer(ProfiledSerializerMixin,
+                          serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField(read_only=True)
     recipes_count = serializers.SerializerMethodField(read_only=True)
 
@@ -80,6 +131,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'follow': 'Вы уже подписаны на этого пользователя!'}
             )
+        get_recipes_limit(self.context['request'])
         return attrs
 
     def to_representation(self, instance):
@@ -92,17 +144,28 @@ class SubscribeSerializer(serializers.ModelSerializer):
         return user_data
 
     def get_recipes(self, obj):
+        authors_recipes = self.context.get('authors_recipes')
+        if authors_recipes is not None:
+            return AuthorRecipeSerializer(
+                authors_recipes[obj.author_id], many=True, context=self.context
+            ).data
         request = self.context.get('request')
         if not request:
-            serializers.ValidationError(
+            raise serializers.ValidationError(
                 {'context': 'Отсутствует обязательный ключ request'}
             )
-        recipes_limit = request.query_params.get('recipes_limit', None)
+        recipes_limit = get_recipes_limit(request)
         queryset = obj.author.recipes.all()
-        if recipes_limit:
-            queryset = queryset[:int(recipes_limit)]
-        return AuthorRecipeSerializer(queryset, many=True).data
+        if recipes_limit is not None:
+            queryset = queryset[:recipes_limit]
+        return AuthorRecipeSerializer(
+            queryset, many=True, context=self.context
+        ).data
 
     @staticmethod
     def get_recipes_count(obj):
-        return obj.author.recipes.count()
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return UserStats.objects.filter(
+            user_id=obj.author_id
+        ).values_list('recipes_count', flat=True).first() or 0
@@ -1,3 +1,5 @@
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Coalesce
 from djoser.views import UserViewSet
 from rest_framework import permissions, status
 from rest_framework.decorators import action
@@ -7,8 +9,10 @@ from rest_framework.viewsets import GenericViewSet
 
 from apps.users.models import Follow, User
 
-from ..foodgram.pagination import LimitPageNumberPagination
-from .serializers import CustomUserSerializer, SubscribeSerializer
+from ..foodgram.pagination import (CursorPaginationMixin,
+                                   LimitPageNumberPagination)
+from .serializers import (CustomUserSerializer, SubscribeSerializer,
+                          get_authors_recipes, get_recipes_limit)
 
 
 class CustomUserViewSet(UserViewSet):
@@ -16,6 +20,15 @@ class CustomUserViewSet(UserViewSet):
     pagination_class = LimitPageNumberPagination
     serializer_class = CustomUserSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        ))
+
     @action(
         methods=['post'],
         detail=True,
@@ -38,18 +51,30 @@ class CustomUserViewSet(UserViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SubscribeViewSet(ListAPIView, GenericViewSet):
+class SubscribeViewSet(CursorPaginationMixin, ListAPIView, GenericViewSet):
     pagination_class = LimitPageNumberPagination
     queryset = Follow.objects.all()
     serializer_class = SubscribeSerializer
     permission_classes = (permissions.IsAuthenticated, )
 
+    def get_queryset(self):
+        return self.request.user.follower.select_related('author').annotate(
+            recipes_count=Coalesce(F('author__stats__recipes_count'), 0)
+        )
+
     def list(self, request, *args, **kwargs):
-        queryset = request.user.follower.all()
-        pages = self.paginate_queryset(queryset)
+        recipes_limit = get_recipes_limit(request)
+        pages = self.paginate_queryset(self.get_queryset())
+        for follow in pages:
+            follow.author.is_subscribed = True
         serializer = SubscribeSerializer(
             instance=pages,
             many=True,
-            context={'request': request}
+            context={
+                'request': request,
+                'authors_recipes': get_authors_recipes(
+                    [follow.author_id for follow in pages], recipes_limit
+                )
+            }
         )
         return self.get_paginated_response(serializer.data)
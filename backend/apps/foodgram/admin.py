@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db.models import F, Prefetch
+from django.db.models.functions import Coalesce
 
 from .models import Cart, Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from .cart_totals import rebuild_recipe_carts
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -23,16 +26,28 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     inlines = (IngredientInLine,)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        rebuild_recipe_carts(form.instance.pk)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_total=Coalesce(F('stats__favorites_count'), 0)
+        ).prefetch_related(Prefetch(
+            'recipe_ingredients',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        ))
+
     def favorite_count(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_total
 
     favorite_count.short_description = 'Добавлений в избранное'
+    favorite_count.admin_order_field = 'favorites_total'
 
     def ingredients(self, obj):
         return ', '.join(
-            (ingredient for value in
-             obj.recipe_ingredients.values_list('ingredient__name')
-             for ingredient in value)
+            recipe_ingredient.ingredient.name
+            for recipe_ingredient in obj.recipe_ingredients.all()
         )
 
     ingredients.short_description = 'Ингрединеты'
@@ -0,0 +1,149 @@
+"""Поддержка таблицы CartIngredient в актуальном состоянии.
+
+Для каждого пользователя хранится сумма количеств каждого ингредиента
+из рецептов в его корзине, поэтому список покупок читается без
+агрегации по всем рецептам корзины.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import Cart, CartIngredient, RecipeIngredient
+from .versions import bump_cart_version_on_commit, bump_carts_epoch_on_commit
+
+UPSERT_SQL = (
+    'INSERT INTO {table} (user_id, ingredient_id, amount) VALUES {values} '
+    'ON CONFLICT (user_id, ingredient_id) '
+    'DO UPDATE SET amount = {table}.amount + EXCLUDED.amount'
+)
+# Три параметра на строку, с запасом под лимит параметров SQLite.
+UPSERT_BATCH_SIZE = 300
+
+
+def recipes_amounts_queryset(recipe_ids):
+    return RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('ingredient_id').annotate(Sum('amount')).order_by()
+
+
+def get_recipes_amounts(recipe_ids):
+    """Суммарные количества ингредиентов нескольких рецептов."""
+    return dict(recipes_amounts_queryset(recipe_ids))
+
+
+def upsert(rows):
+    """Прибавляет (user_id, ingredient_id, amount) к итогам или создаёт их.
+
+    Параллельные добавления разных рецептов с общим ингредиентом не
+    падают на уникальности (user, ingredient): второй INSERT
+    превращается в прибавление к строке первого.
+    """
+    table = connection.ops.quote_name(CartIngredient._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(UPSERT_SQL.format(
+                table=table, values=', '.join(['(%s, %s, %s)'] * len(batch))
+            ), [value for row in batch for value in row])
+
+
+@transaction.atomic
+def apply_deltas(user_ids, deltas):
+    """Прибавляет deltas {ingredient_id: количество} к итогам пользователей."""
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    user_ids = list(user_ids)
+    if not deltas or not user_ids:
+        return
+    upsert([
+        (user_id, ingredient_id, delta)
+        for user_id in user_ids
+        for ingredient_id, delta in deltas.items() if delta > 0
+    ])
+    decreases = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta < 0
+    }
+    if decreases:
+        # Уменьшать можно только существующие строки, вставлять нечего.
+        totals = CartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=decreases
+        )
+        totals.update(amount=F('amount') + Case(
+            *(When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in decreases.items()),
+            output_field=IntegerField()
+        ))
+        totals.filter(amount__lte=0).delete()
+    for user_id in user_ids:
+        bump_cart_version_on_commit(user_id)
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_deltas((user_id,), get_recipes_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_deltas((user_id,), {
+        ingredient_id: -amount
+        for ingredient_id, amount in get_recipes_amounts(recipe_ids).items()
+    })
+
+
+def apply_recipe_changes(recipe_id, deltas):
+    """Переносит изменение ингредиентов рецепта в корзины с этим рецептом."""
+    apply_deltas(
+        Cart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        deltas
+    )
+
+
+def totals_queryset(user_ids=None):
+    carts = Cart.objects.all()
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    return carts.values_list(
+        'user_id', 'recipe__recipe_ingredients__ingredient_id'
+    ).annotate(
+        Sum('recipe__recipe_ingredients__amount')
+    ).order_by()
+
+
+def calculate_totals(user_ids=None):
+    """Считает итоги корзин с нуля по таблице RecipeIngredient."""
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in totals_queryset(user_ids)
+        if ingredient_id is not None
+    }
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Пересобирает итоги корзин указанных (или всех) пользователей."""
+    totals = CartIngredient.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        totals = totals.filter(user_id__in=user_ids)
+    totals.delete()
+    CartIngredient.objects.bulk_create(
+        (CartIngredient(user_id=user_id, ingredient_id=ingredient_id,
+                        amount=amount)
+         for (user_id, ingredient_id), amount
+         in calculate_totals(user_ids).items()),
+        batch_size=1000
+    )
+    if user_ids is None:
+        bump_carts_epoch_on_commit()
+    else:
+        for user_id in user_ids:
+            bump_cart_version_on_commit(user_id)
+
+
+def rebuild_recipe_carts(recipe_id):
+    rebuild(Cart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
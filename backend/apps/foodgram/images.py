@@ -0,0 +1,131 @@
+"""Миниатюры картинок рецептов.
+
+Оригинал картинки сохраняется в запросе как раньше, а уменьшенные
+копии в формате WebP строятся после фиксации транзакции в пуле
+потоков (IMAGE_WORKERS; при 0 — сразу в текущем потоке). Когда
+миниатюры готовы, в renditions_source рецепта записывается имя
+оригинала, для которого они построены, и повышается версия рецепта,
+чтобы закэшированные представления подхватили новые ссылки, а
+миниатюры прежней картинки удаляются. Пока миниатюр нет, вместо них
+отдаётся ссылка на оригинал.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image
+
+from .models import Recipe
+from .versions import bump_recipe_version_on_commit
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumbnail': (320, 320),
+    'medium': (960, 960),
+}
+RENDITIONS_DIR = 'recipes/renditions'
+WEBP_QUALITY = 80
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS,
+        thread_name_prefix='recipe-renditions'
+    )
+
+
+def rendition_name(image_name, rendition):
+    stem = PurePosixPath(image_name).stem
+    return f'{RENDITIONS_DIR}/{stem}_{rendition}.webp'
+
+
+def render(image, size):
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS)
+    if copy.mode not in ('RGB', 'RGBA'):
+        copy = copy.convert('RGBA' if 'A' in copy.getbands() else 'RGB')
+    buffer = BytesIO()
+    copy.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def make_renditions(recipe_id, image_name):
+    """Строит миниатюры картинки image_name рецепта recipe_id."""
+    storage = Recipe._meta.get_field('image').storage
+    with storage.open(image_name) as file, Image.open(file) as image:
+        image.load()
+        for rendition, size in RENDITIONS.items():
+            name = rendition_name(image_name, rendition)
+            storage.delete(name)
+            storage.save(name, render(image, size))
+    previous = Recipe.objects.filter(pk=recipe_id).values_list(
+        'renditions_source', flat=True
+    ).first()
+    # Если картинку успели заменить, миниатюры построит следующая задача.
+    if not Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        renditions_source=image_name
+    ):
+        return
+    bump_recipe_version_on_commit(recipe_id)
+    if previous and previous != image_name:
+        delete_renditions(previous)
+
+
+def delete_renditions(image_name):
+    """Удаляет миниатюры картинки, которую заменили новой."""
+    storage = Recipe._meta.get_field('image').storage
+    for rendition in RENDITIONS:
+        storage.delete(rendition_name(image_name, rendition))
+
+
+def run_renditions(recipe_id, image_name):
+    try:
+        make_renditions(recipe_id, image_name)
+    except Exception:
+        logger.exception(
+            'Не удалось построить миниатюры рецепта %s', recipe_id
+        )
+    finally:
+        if settings.IMAGE_WORKERS:
+            connection.close()
+
+
+def schedule_renditions(recipe):
+    """Ставит построение миниатюр в очередь после фиксации транзакции."""
+    if not recipe.image or recipe.image.name == recipe.renditions_source:
+        return
+    args = (recipe.pk, recipe.image.name)
+    if settings.IMAGE_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_renditions, *args)
+        )
+    else:
+        transaction.on_commit(lambda: run_renditions(*args))
+
+
+def get_image_urls(recipe, request=None):
+    """Ссылки на оригинал и все миниатюры картинки рецепта."""
+    if not recipe.image:
+        return None
+    storage = recipe.image.storage
+    original = recipe.image.url
+    ready = recipe.image.name == recipe.renditions_source
+    urls = {'original': original}
+    for rendition in RENDITIONS:
+        urls[rendition] = (
+            storage.url(rendition_name(recipe.image.name, rendition))
+            if ready else original
+        )
+    if request is None:
+        return urls
+    return {
+        rendition: request.build_absolute_uri(url)
+        for rendition, url in urls.items()
+    }
@@ -0,0 +1,63 @@
+"""Индекс названий ингредиентов для поиска по префиксу в памяти процесса.
+
+Справочник ингредиентов небольшой и почти не меняется, поэтому он
+целиком держится в отсортированном списке, а поиск выполняется
+бинарным поиском без обращения к базе. Индекс строится лениво при
+первом запросе и перестраивается, когда меняется версия справочника
+(её повышает сигнал сохранения или удаления Ingredient).
+"""
+import threading
+from bisect import bisect_left
+
+from .models import Ingredient
+from .versions import INGREDIENTS_VERSION_KEY, get_version
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._items = []
+
+    def _build(self, version):
+        entries = sorted(
+            (normalize(name), pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).order_by()
+        )
+        self._keys = [key for key, *_ in entries]
+        self._items = [
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for _, pk, name, unit in entries
+        ]
+        self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def search(self, prefix, limit=None):
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        with self._lock:
+            if self._version != version:
+                self._build(version)
+            keys, items = self._keys, self._items
+        prefix = normalize(prefix)
+        start = bisect_left(keys, prefix)
+        result = []
+        for position in range(start, len(keys)):
+            if not keys[position].startswith(prefix):
+                break
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(items[position])
+        return result
+
+
+ingredient_index = IngredientIndex()
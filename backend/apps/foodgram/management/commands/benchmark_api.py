@@ -0,0 +1,209 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from apps.foodgram.models import Cart, Ingredient, Recipe, Tag
+from apps.users.models import Follow
+
+BUDGETS_FILE = os.path.join(
+    settings.BASE_DIR, 'data', 'benchmark_budgets.json'
+)
+PERCENTILES = (50, 95, 99)
+# Время сравнивается по медиане: хвосты распределения на малом числе
+# итераций — это шум машины, а не регрессия.
+MIN_TIME_ITERATIONS = 20
+# Ответы из кэша занимают доли миллисекунды, и относительный запас
+# для них меньше шума измерений.
+MIN_HEADROOM_MS = 5
+# Сценарий: имя, нужен ли токен, шаблон адреса.
+SCENARIOS = (
+    ('recipes', False, '/api/recipes/'),
+    ('recipes_auth', True, '/api/recipes/'),
+    ('recipe_detail', True, '/api/recipes/{recipe}/'),
+    ('recipes_tags', True, '/api/recipes/?tags={tag}'),
+    ('recipes_author', True, '/api/recipes/?author={author}'),
+    ('recipes_favorited', True, '/api/recipes/?is_favorited=1'),
+    ('recipes_search', False, '/api/recipes/?search={word}'),
+    ('subscriptions', True,
+     '/api/users/subscriptions/?recipes_limit=3'),
+    ('ingredients_search', False, '/api/ingredients/?name={prefix}'),
+    ('download_shopping_cart', True,
+     '/api/recipes/download_shopping_cart/'),
+)
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, len(ordered) * rank // 100)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени ответа и числа запросов к базе для основных '
+        'эндпоинтов API с проверкой записанных бюджетов: по умолчанию '
+        'проверяется число запросов, медиана времени — с --check-time'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--budgets', default=BUDGETS_FILE)
+        parser.add_argument(
+            '--record', action='store_true',
+            help='Записать бюджеты по результатам замера'
+        )
+        parser.add_argument(
+            '--headroom', type=float, default=1.5,
+            help='Запас по времени при записи бюджетов'
+        )
+        parser.add_argument(
+            '--check-time', action='store_true',
+            help='Проверять и медиану времени ответа (на той же машине, '
+                 'где записаны бюджеты)'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэши перед каждым запросом'
+        )
+        parser.add_argument('--only', nargs='*', default=None)
+
+    @staticmethod
+    def build_context():
+        """Параметры адресов: самый «нагруженный» пользователь и его данные."""
+        user_id = (
+            Cart.objects.values('user').annotate(total=Count('id'))
+            .order_by('-total').values_list('user', flat=True).first()
+            or Follow.objects.values_list('user', flat=True).first()
+        )
+        # Рецепт из середины таблицы, чтобы замеры были повторяемыми.
+        recipes = Recipe.objects.order_by('id').only('id', 'name', 'author')
+        recipe = recipes[recipes.count() // 2] if recipes.exists() else None
+        tag = Tag.objects.order_by('id').values_list('slug', flat=True).first()
+        ingredient = Ingredient.objects.order_by('id').values_list(
+            'name', flat=True
+        ).first()
+        if user_id is None or recipe is None or tag is None:
+            raise CommandError(
+                'База пуста: сначала выполните generate_data'
+            )
+        return user_id, {
+            'recipe': recipe.id,
+            'author': recipe.author_id,
+            'tag': tag,
+            'word': recipe.name.split()[0],
+            'prefix': (ingredient or 'а')[:2],
+        }
+
+    def measure(self, client, url, headers, iterations, cold):
+        timings = []
+        queries = 0
+        for _ in range(iterations):
+            if cold:
+                for cache in caches.all():
+                    cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url, **headers)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url}: код ответа {response.status_code}'
+                )
+            queries = max(queries, len(context))
+        return timings, queries
+
+    def read_budgets(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='UTF-8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def compare(name, result, budget, check_time):
+        failures = []
+        if check_time and result['p50_ms'] > budget['p50_ms']:
+            failures.append(
+                f'{name}: p50 {result["p50_ms"]:.1f} мс > '
+                f'{budget["p50_ms"]} мс'
+            )
+        if result['queries'] > budget['queries']:
+            failures.append(
+                f'{name}: запросов {result["queries"]} > {budget["queries"]}'
+            )
+        return failures
+
+    def handle(self, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Нужна хотя бы одна итерация')
+        if ((options['record'] or options['check_time'])
+                and options['iterations'] < MIN_TIME_ITERATIONS):
+            raise CommandError(
+                f'Для записи и проверки времени нужно не меньше '
+                f'{MIN_TIME_ITERATIONS} итераций'
+            )
+        user_id, context = self.build_context()
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        client = Client()
+        # Бюджеты с прогретыми и холодными кэшами хранятся раздельно.
+        mode = 'cold' if options['cold'] else 'warm'
+        all_budgets = self.read_budgets(options['budgets'])
+        budgets = all_budgets.setdefault(mode, {})
+        results = {}
+        failures = []
+        for name, authenticated, url in SCENARIOS:
+            if options['only'] and name not in options['only']:
+                continue
+            url = url.format(**context)
+            headers = auth if authenticated else {}
+            # Первый запрос прогревает кэши и индексы процесса.
+            if not options['cold']:
+                client.get(url, **headers)
+            timings, queries = self.measure(
+                client, url, headers, options['iterations'], options['cold']
+            )
+            marks = {
+                rank: percentile(timings, rank) for rank in PERCENTILES
+            }
+            results[name] = {'p50_ms': marks[50], 'queries': queries}
+            self.stdout.write(
+                f'{name:<24} ' + ' '.join(
+                    f'p{rank} {value:7.1f} мс'
+                    for rank, value in marks.items()
+                ) + f'  запросов {queries}'
+            )
+            if not options['record'] and name in budgets:
+                failures.extend(self.compare(
+                    name, results[name], budgets[name], options['check_time']
+                ))
+        if options['record']:
+            budgets.update({
+                name: {
+                    'p50_ms': round(max(
+                        result['p50_ms'] * options['headroom'],
+                        result['p50_ms'] + MIN_HEADROOM_MS
+                    ), 1),
+                    'queries': result['queries'],
+                }
+                for name, result in results.items()
+            })
+            with open(options['budgets'], 'w', encoding='UTF-8') as file:
+                json.dump(all_budgets, file, indent=4, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Бюджеты ({mode}) записаны в {options["budgets"]}'
+            ))
+            return
+        if failures:
+            raise CommandError(
+                'Превышены бюджеты:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Бюджеты соблюдены'))
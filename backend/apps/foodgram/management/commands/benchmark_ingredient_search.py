@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.foodgram.ingredient_index import IngredientIndex
+from apps.foodgram.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = 'Сравнение поиска ингредиентов по префиксу: база данных и индекс'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @staticmethod
+    def measure(search, prefixes):
+        start = time.perf_counter()
+        for prefix in prefixes:
+            search(prefix)
+        return (time.perf_counter() - start) / len(prefixes)
+
+    def handle(self, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Справочник ингредиентов пуст, загрузите его upload_recipes'
+            )
+        rnd = random.Random(options['seed'])
+        prefixes = [
+            name[:rnd.randint(1, 4)]
+            for name in rnd.choices(names, k=options['queries'])
+        ]
+        limit = options['limit']
+        index = IngredientIndex()
+        start = time.perf_counter()
+        index.search('')
+        build = time.perf_counter() - start
+
+        def search_db(prefix):
+            return list(Ingredient.objects.filter(
+                name__istartswith=prefix
+            ).values('id', 'name', 'measurement_unit')[:limit])
+
+        database = self.measure(search_db, prefixes)
+        in_memory = self.measure(
+            lambda prefix: index.search(prefix, limit), prefixes
+        )
+        self.stdout.write(
+            f'Ингредиентов: {len(names)}, запросов: {len(prefixes)}\n'
+            f'Построение индекса: {build * 1000:.1f} мс\n'
+            f'База данных: {database * 1e6:.0f} мкс на запрос\n'
+            f'Индекс: {in_memory * 1e6:.0f} мкс на запрос '
+            f'(в {database / in_memory:.0f} раз быстрее)'
+        )
@@ -0,0 +1,93 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.foodgram.recipe_index import RecipeIngredientIndex
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер обратного индекса ингредиентов на синтетических рецептах '
+        'в сравнении с перебором множеств'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=9)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--pantry', type=int, default=15)
+        parser.add_argument('--missing', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @staticmethod
+    def measure(search, queries):
+        start = time.perf_counter()
+        results = [search(query) for query in queries]
+        return (time.perf_counter() - start) / len(queries), results
+
+    def build_recipes(self, options, rnd):
+        # Популярность ингредиентов неравномерна, как у соли и шафрана.
+        catalogue = range(1, options['ingredients'] + 1)
+        weights = [1 / rank for rank in catalogue]
+        recipes = {}
+        for recipe_id in range(1, options['recipes'] + 1):
+            size = max(1, int(rnd.gauss(options['per_recipe'], 3)))
+            recipes[recipe_id] = set(
+                rnd.choices(catalogue, weights=weights, k=size)
+            )
+        return recipes
+
+    def handle(self, **options):
+        if options['recipes'] < 1 or options['ingredients'] < 2:
+            raise CommandError('Слишком маленький набор данных')
+        rnd = random.Random(options['seed'])
+        recipes = self.build_recipes(options, rnd)
+        limit = options['missing']
+        index = RecipeIngredientIndex(sync=False)
+        start = time.perf_counter()
+        index.load(recipes)
+        build = time.perf_counter() - start
+
+        samples = rnd.sample(list(recipes.values()), options['queries'])
+        pantries = [
+            set(ingredients) | set(rnd.sample(
+                range(1, options['ingredients'] + 1), options['pantry']
+            ))
+            for ingredients in samples
+        ]
+
+        by_ingredient = {}
+        for recipe_id, ingredients in recipes.items():
+            for ingredient_id in ingredients:
+                by_ingredient.setdefault(ingredient_id, set()).add(recipe_id)
+
+        def missing_with_sets(pantry):
+            groups = [[] for _ in range(limit + 1)]
+            candidates = set().union(*(
+                by_ingredient.get(pk, ()) for pk in pantry
+            ))
+            for recipe_id in sorted(candidates, reverse=True):
+                missing = len(recipes[recipe_id] - pantry)
+                if missing <= limit:
+                    groups[missing].append(recipe_id)
+            return groups
+
+        self.stdout.write(
+            f'Рецептов: {len(recipes)}, ингредиентов: '
+            f'{options["ingredients"]}, запросов: {len(samples)}\n'
+            f'Построение индекса: {build * 1000:.0f} мс'
+        )
+        bitset_time, bitset_results = self.measure(
+            lambda pantry: index.missing_at_most(pantry, limit), pantries
+        )
+        sets_time, sets_results = self.measure(missing_with_sets, pantries)
+        if bitset_results != sets_results:
+            raise CommandError('Результаты расходятся')
+        self.stdout.write(
+            f'Не хватает до {limit}: битовые множества '
+            f'{bitset_time * 1000:.2f} мс, множества Python '
+            f'{sets_time * 1000:.2f} мс на запрос '
+            f'(в {sets_time / bitset_time:.1f} раз быстрее)'
+        )
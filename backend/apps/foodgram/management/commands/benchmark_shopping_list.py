@@ -0,0 +1,64 @@
+import csv
+import io
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from api.foodgram.shopping_list import register_fonts, render_shopping_list
+
+from .upload_recipes import FILE_TO_OPEN
+
+CART_SIZES = (10, 100, 1000)
+INGREDIENTS_PER_RECIPE = 8
+
+
+class Command(BaseCommand):
+    help = 'Замер генерации PDF списка покупок для корзин разного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @staticmethod
+    def build_cart(catalogue, recipes, rnd):
+        totals = {}
+        for _ in range(recipes):
+            for name, unit in rnd.sample(catalogue, INGREDIENTS_PER_RECIPE):
+                totals[name, unit] = (
+                    totals.get((name, unit), 0) + rnd.randint(1, 500)
+                )
+        return [
+            (name, unit, amount)
+            for (name, unit), amount in sorted(totals.items())
+        ]
+
+    def handle(self, **options):
+        rnd = random.Random(options['seed'])
+        with open(FILE_TO_OPEN, 'r', encoding='UTF-8') as file:
+            catalogue = [tuple(row[:2]) for row in csv.reader(file)]
+        start = time.perf_counter()
+        register_fonts()
+        self.stdout.write(
+            f'Загрузка шрифта: {(time.perf_counter() - start) * 1000:.1f} мс'
+        )
+        for recipes in CART_SIZES:
+            rows = self.build_cart(catalogue, recipes, rnd)
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                pdf = render_shopping_list(rows, io.BytesIO()).getvalue()
+                timings.append(time.perf_counter() - start)
+            key = f'benchmark_shopping_list:{recipes}'
+            cache.set(key, pdf)
+            start = time.perf_counter()
+            cache.get(key)
+            cached = time.perf_counter() - start
+            cache.delete(key)
+            self.stdout.write(
+                f'{recipes:>5} рецептов, {len(rows):>5} строк: '
+                f'рендер {min(timings) * 1000:.1f} мс '
+                f'(медиана {sorted(timings)[len(timings) // 2] * 1000:.1f}), '
+                f'из кэша {cached * 1000:.3f} мс, {len(pdf) // 1024} КБ'
+            )
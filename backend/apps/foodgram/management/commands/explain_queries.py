@@ -0,0 +1,320 @@
+import json
+import os
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.db.models.query import RawQuerySet
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.foodgram.shopping_list import get_shopping_list
+from api.foodgram.views import IngredientViewSet, RecipeViewSet
+from api.users.serializers import authors_recipes_queryset
+from api.users.views import SubscribeViewSet
+from apps.foodgram import cart_totals
+from apps.foodgram.models import Cart, RecipeIngredient, Tag
+from apps.users.models import User
+
+GOLDEN_FILE = os.path.join(settings.BASE_DIR, 'data', 'query_plans.json')
+MIN_ROWS = 10000
+# Строки EXPLAIN QUERY PLAN SQLite: SCAN/SEARCH таблица [USING индекс].
+SQLITE_STEP_RE = re.compile(
+    r'^(?P<step>SCAN|SEARCH) (?P<table>\S+)'
+    r'(?: USING (?P<using>COVERING INDEX|INDEX|INTEGER PRIMARY KEY'
+    r'|PRIMARY KEY)(?: (?P<index>\S+))?)?'
+    r'(?P<virtual> VIRTUAL TABLE)?'
+)
+# Таблицы SQLite упорядочены по rowid: SCAN без сортировки при ORDER BY
+# первичного ключа — это обход первичного ключа, а не полное чтение.
+ORDER_BY_PK_RE = re.compile(
+    r'ORDER BY "(\w+)"\."id" (?:ASC|DESC)(?: LIMIT \d+)?$'
+)
+# Шаги, читающие таблицу целиком (обход индекса без условия тоже).
+FULL_READS = ('seq scan', 'full index scan')
+POSTGRES_NODES = {
+    'Seq Scan': 'seq scan',
+    'Index Scan': 'index scan',
+    'Index Only Scan': 'index only scan',
+    'Bitmap Heap Scan': 'bitmap heap scan',
+    'Bitmap Index Scan': 'bitmap index scan',
+    'Sort': 'sort',
+}
+
+
+def format_step(kind, table=None, index=None):
+    return ' '.join(filter(None, (
+        kind, table, f'using {index}' if index else None
+    )))
+
+
+def full_read_table(step):
+    for kind in FULL_READS:
+        if step.startswith(kind + ' '):
+            return step[len(kind) + 1:].split()[0]
+    return None
+
+
+def sqlite_step(match, index_tables, pk_ordered):
+    using = match['using']
+    index = match['index']
+    if using in ('INTEGER PRIMARY KEY', 'PRIMARY KEY'):
+        index = 'primary key'
+    # Во вложенных запросах SQLite называет таблицы псевдонимами
+    # Django (U0, V0), поэтому таблицу по возможности берём из индекса.
+    table = index_tables.get(index, match['table'])
+    if match['virtual']:
+        kind = 'virtual table scan'
+    elif using is None and pk_ordered == table:
+        kind, index = 'full index scan', 'primary key'
+    elif using is None:
+        kind = 'seq scan'
+    elif match['step'] == 'SCAN':
+        kind = 'full index scan'
+    elif using == 'COVERING INDEX':
+        kind = 'index only scan'
+    else:
+        kind = 'index scan'
+    return format_step(kind, table, index)
+
+
+def sqlite_plan(cursor, sql, params):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+    details = [detail for *_, detail in cursor.fetchall()]
+    cursor.execute(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"
+    )
+    index_tables = dict(cursor.fetchall())
+    sorted_in_memory = any(
+        detail.startswith('USE TEMP B-TREE') for detail in details
+    )
+    match = ORDER_BY_PK_RE.search(sql)
+    pk_ordered = match[1] if match and not sorted_in_memory else None
+    steps = []
+    for detail in details:
+        if detail.startswith('USE TEMP B-TREE'):
+            steps.append(format_step('sort'))
+            continue
+        match = SQLITE_STEP_RE.match(detail)
+        if match is not None:
+            steps.append(sqlite_step(match, index_tables, pk_ordered))
+    return steps
+
+
+def postgres_plan(cursor, sql, params):
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    steps = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop(0)
+        kind = POSTGRES_NODES.get(node['Node Type'])
+        if kind in ('index scan', 'index only scan') and (
+            'Index Cond' not in node
+        ):
+            kind = 'full index scan'
+        if kind is not None:
+            steps.append(format_step(
+                kind, node.get('Relation Name'), node.get('Index Name')
+            ))
+        nodes.extend(node.get('Plans', ()))
+    return steps
+
+
+EXPLAINERS = {'sqlite': sqlite_plan, 'postgresql': postgres_plan}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN ключевых запросов и сравнение с эталонными планами: '
+        'ошибка, если запрос перешёл на последовательное чтение большой '
+        'таблицы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--golden', default=GOLDEN_FILE)
+        parser.add_argument(
+            '--record', action='store_true',
+            help='Записать текущие планы как эталонные'
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=MIN_ROWS,
+            help='С какого числа строк таблица считается большой'
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Считать ошибкой любое расхождение с эталоном'
+        )
+
+    @staticmethod
+    def make_request(user, params=None):
+        request = Request(APIRequestFactory().get('/', params or {}))
+        request.user = user
+        return request
+
+    def recipe_list(self, user, params=None):
+        """Первая страница списка рецептов так, как её строит view."""
+        view = RecipeViewSet(
+            request=self.make_request(user, params),
+            format_kwarg=None, action='list', args=(), kwargs={}
+        )
+        return view.filter_queryset(view.get_queryset())[
+            :settings.REST_FRAMEWORK['PAGE_SIZE']
+        ]
+
+    def build_queries(self):
+        user = Cart.objects.values('user').annotate(
+            total=Count('id')
+        ).order_by('-total').values_list('user', flat=True).first()
+        recipe = RecipeIngredient.objects.values_list(
+            'recipe', flat=True
+        ).order_by('recipe').first()
+        tag = Tag.objects.values_list('slug', flat=True).first()
+        if user is None or recipe is None or tag is None:
+            raise CommandError('База пуста: сначала выполните generate_data')
+        user = User.objects.get(pk=user)
+        recipe = RecipeViewSet.queryset.select_related('author').get(
+            pk=recipe
+        )
+        ingredient_ids = ','.join(map(str, recipe.recipe_ingredients.order_by(
+            'ingredient_id'
+        ).values_list('ingredient_id', flat=True)[:2]))
+        subscriptions = SubscribeViewSet(
+            request=self.make_request(user), format_kwarg=None,
+            args=(), kwargs={}
+        ).get_queryset()[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+        cart_recipes = list(user.carts.values_list('recipe_id', flat=True))
+        anonymous = AnonymousUser()
+        return {
+            'recipes': self.recipe_list(anonymous),
+            'recipes_auth': self.recipe_list(user),
+            'recipes_name': self.recipe_list(user, {'name': recipe.name}),
+            'recipes_tags': self.recipe_list(user, {'tags': tag}),
+            'recipes_author': self.recipe_list(
+                user, {'author': recipe.author_id}
+            ),
+            'recipes_is_favorited': self.recipe_list(
+                user, {'is_favorited': 1}
+            ),
+            'recipes_is_in_shopping_cart': self.recipe_list(
+                user, {'is_in_shopping_cart': 1}
+            ),
+            'recipes_search': self.recipe_list(
+                user, {'search': recipe.name.split()[0]}
+            ),
+            'recipes_ingredients': self.recipe_list(
+                user, {'ingredients': ingredient_ids}
+            ),
+            'recipes_missing': self.recipe_list(
+                user, {'ingredients': ingredient_ids, 'missing': 2}
+            ),
+            'subscriptions': subscriptions,
+            'subscriptions_recipes': authors_recipes_queryset(
+                [follow.author_id for follow in subscriptions], 3
+            ),
+            'shopping_list': get_shopping_list(user),
+            'cart_totals': cart_totals.totals_queryset([user.pk]),
+            'cart_recipes_amounts': cart_totals.recipes_amounts_queryset(
+                cart_recipes
+            ),
+            # Поиск по префиксу обслуживает ingredient_index в памяти,
+            # из базы справочник читается целиком при его построении.
+            'ingredients': IngredientViewSet.queryset.all(),
+        }
+
+    @staticmethod
+    def get_sql(queryset):
+        if isinstance(queryset, RawQuerySet):
+            return queryset.raw_query, queryset.params
+        return queryset.query.sql_with_params()
+
+    @staticmethod
+    def count_rows(cursor, tables):
+        existing = set(connection.introspection.table_names(cursor))
+        counts = {}
+        for table in tables & existing:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            counts[table] = cursor.fetchone()[0]
+        return counts
+
+    def read_golden(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='UTF-8') as file:
+            return json.load(file)
+
+    def collect_plans(self, explain, min_rows):
+        plans = {}
+        with connection.cursor() as cursor:
+            for name, queryset in self.build_queries().items():
+                plans[name] = explain(cursor, *self.get_sql(queryset))
+            rows = self.count_rows(cursor, {
+                full_read_table(step) for steps in plans.values()
+                for step in steps if full_read_table(step)
+            })
+        return plans, {
+            table for table, count in rows.items() if count >= min_rows
+        }
+
+    def compare(self, plans, large, golden, strict):
+        failures = []
+        for name, steps in plans.items():
+            expected = golden.get(name)
+            degraded = [
+                full_read_table(step) for step in steps
+                if full_read_table(step) in large
+                and step not in (expected or ())
+            ]
+            if degraded:
+                failures.append(
+                    f'{name}: последовательное чтение {", ".join(degraded)}'
+                )
+            elif expected is not None and expected != steps:
+                message = f'{name}: план отличается от эталона {expected}'
+                if strict:
+                    failures.append(message)
+                else:
+                    self.stdout.write(self.style.WARNING(message))
+        return failures
+
+    def handle(self, **options):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается'
+            )
+        plans, large = self.collect_plans(explain, options['min_rows'])
+        for name, steps in plans.items():
+            self.stdout.write(f'{name}:')
+            for step in steps:
+                mark = (
+                    '  <- большая таблица'
+                    if full_read_table(step) in large else ''
+                )
+                self.stdout.write(f'    {step}{mark}')
+        golden_file = self.read_golden(options['golden'])
+        golden = golden_file.setdefault(connection.vendor, {})
+        if options['record']:
+            golden.clear()
+            golden.update(plans)
+            with open(options['golden'], 'w', encoding='UTF-8') as file:
+                json.dump(golden_file, file, indent=4, sort_keys=True,
+                          ensure_ascii=False)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Планы ({connection.vendor}) записаны в {options["golden"]}'
+            ))
+            return
+        failures = self.compare(plans, large, golden, options['strict'])
+        if failures:
+            raise CommandError(
+                'Планы запросов деградировали:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке'))
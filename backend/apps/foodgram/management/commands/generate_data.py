@@ -0,0 +1,212 @@
+import random
+import time
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.foodgram import cart_totals
+from apps.foodgram.models import (Cart, Favorite, Ingredient, Recipe,
+                                  RecipeIngredient, Tag)
+from apps.foodgram.recipe_index import record_full_change
+from apps.foodgram.search import update_search_index
+from apps.foodgram.versions import (INGREDIENTS_VERSION_KEY,
+                                    RECIPES_CACHE_ALIAS, RECIPES_EPOCH_KEY,
+                                    RECIPES_VERSION_KEY, TAGS_VERSION_KEY,
+                                    bump_version)
+from apps.users.models import Follow, User
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark-password'
+IMAGE_NAME = 'recipes/benchmark.png'
+# Прозрачный PNG 1x1: картинка одна на все сгенерированные рецепты.
+IMAGE_CONTENT = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000'
+    '000049454e44ae426082'
+)
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F0C419', 'dessert'),
+)
+DISHES = (
+    'Суп', 'Салат', 'Рагу', 'Запеканка', 'Пирог', 'Каша', 'Омлет',
+    'Паста', 'Котлеты', 'Блины', 'Плов', 'Жаркое', 'Смузи', 'Сырники',
+)
+DESCRIPTIONS = (
+    'Нарезать, смешать и довести до готовности на среднем огне.',
+    'Запекать в разогретой духовке до золотистой корочки.',
+    'Подавать горячим, посыпав свежей зеленью.',
+    'Оставить на ночь в холодильнике, чтобы вкус раскрылся.',
+)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических пользователей, рецептов, подписок, '
+        'избранного и корзин для нагрузочных замеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows-per-user', type=int, default=5)
+        parser.add_argument('--favorites-per-user', type=int, default=10)
+        parser.add_argument('--carts-per-user', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def step(self, title, started):
+        self.stdout.write(
+            f'{title}: {time.perf_counter() - started:.1f} с'
+        )
+        return time.perf_counter()
+
+    def insert(self, model, objects):
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def ensure_catalogue(self):
+        if not Ingredient.objects.exists():
+            call_command('upload_recipes', stdout=self.stdout)
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        storage = Recipe._meta.get_field('image').storage
+        if not storage.exists(IMAGE_NAME):
+            storage.save(IMAGE_NAME, ContentFile(IMAGE_CONTENT))
+
+    def create_users(self, count, prefix):
+        password = make_password(PASSWORD)
+        first_id = (User.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0) + 1
+        self.insert(User, (
+            User(
+                username=f'{prefix}{first_id + number}',
+                email=f'{prefix}{first_id + number}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password
+            )
+            for number in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).values_list('id', flat=True))
+
+    def create_recipes(self, count, user_ids, rnd):
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        self.insert(Recipe, (
+            Recipe(
+                author_id=rnd.choice(user_ids),
+                name=f'{rnd.choice(DISHES)} №{number}',
+                image=IMAGE_NAME,
+                text=rnd.choice(DESCRIPTIONS),
+                cooking_time=rnd.randint(5, 180)
+            )
+            for number in range(count)
+        ))
+        return list(Recipe.objects.filter(id__gt=last_id).values_list(
+            'id', flat=True
+        ))
+
+    def fill_recipes(self, recipe_ids, per_recipe, rnd):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        rnd.shuffle(ingredient_ids)
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        # Несколько ингредиентов встречаются заметно чаще остальных.
+        cum_weights = list(accumulate(
+            1 / rank for rank in range(1, len(ingredient_ids) + 1)
+        ))
+        through = Recipe.tags.through
+
+        def recipe_ingredients():
+            for recipe_id in recipe_ids:
+                size = min(rnd.randint(2, per_recipe * 2), len(ingredient_ids))
+                chosen = set(rnd.choices(
+                    ingredient_ids, cum_weights=cum_weights, k=size
+                ))
+                for ingredient_id in chosen:
+                    yield RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=rnd.randint(1, 500)
+                    )
+
+        self.insert(RecipeIngredient, recipe_ingredients())
+        self.insert(through, (
+            through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rnd.sample(tag_ids, rnd.randint(1, 2))
+        ))
+
+    def link_users(self, model, field, per_user, user_ids, targets, rnd):
+        per_user = min(per_user, len(targets))
+        self.insert(model, (
+            model(user_id=user_id, **{field: target})
+            for user_id in user_ids
+            for target in rnd.sample(targets, per_user)
+            if model is not Follow or target != user_id
+        ))
+
+    def handle(self, **options):
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно хотя бы два пользователя и один рецепт')
+        self.batch_size = options['batch_size']
+        rnd = random.Random(options['seed'])
+        started = total = time.perf_counter()
+        self.ensure_catalogue()
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'], options['prefix'])
+            started = self.step(f'Пользователи ({len(user_ids)})', started)
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, rnd
+            )
+            self.fill_recipes(
+                recipe_ids, options['ingredients_per_recipe'], rnd
+            )
+            started = self.step(f'Рецепты ({len(recipe_ids)})', started)
+            self.link_users(Follow, 'author_id', options['follows_per_user'],
+                            user_ids, user_ids, rnd)
+            self.link_users(Favorite, 'recipe_id',
+                            options['favorites_per_user'],
+                            user_ids, recipe_ids, rnd)
+            self.link_users(Cart, 'recipe_id', options['carts_per_user'],
+                            user_ids, recipe_ids, rnd)
+            started = self.step('Подписки, избранное и корзины', started)
+        # Пакетные вставки не вызывают сигналов: пересчитываем
+        # производные данные и сбрасываем кэши явно.
+        call_command('reconcile_counters', stdout=self.stdout)
+        for batch in batched(user_ids, self.batch_size):
+            cart_totals.rebuild(batch)
+        for batch in batched(recipe_ids, self.batch_size):
+            update_search_index(batch)
+        record_full_change()
+        for key in (INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY):
+            bump_version(key)
+        for key in (RECIPES_VERSION_KEY, RECIPES_EPOCH_KEY):
+            bump_version(key, RECIPES_CACHE_ALIAS)
+        self.step('Счётчики, корзины и поиск', started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - total:.1f} с, '
+            f'пароль пользователей: {PASSWORD}'
+        ))
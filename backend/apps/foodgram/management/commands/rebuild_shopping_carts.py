@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.foodgram import cart_totals
+from apps.foodgram.models import CartIngredient
+
+
+class Command(BaseCommand):
+    help = 'Пересборка или проверка итогов списков покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить итоги с пересчитанными, не изменяя их'
+        )
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Ограничить пересборку указанными id пользователей'
+        )
+
+    def handle(self, **options):
+        users = options['users']
+        if not options['verify']:
+            cart_totals.rebuild(users)
+            self.stdout.write(self.style.SUCCESS('Итоги корзин пересобраны'))
+            return
+        expected = cart_totals.calculate_totals(users)
+        stored = CartIngredient.objects.all()
+        if users:
+            stored = stored.filter(user_id__in=users)
+        actual = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in stored.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            )
+        }
+        mismatches = [
+            (key, actual.get(key), expected.get(key))
+            for key in sorted(set(expected) | set(actual))
+            if actual.get(key) != expected.get(key)
+        ]
+        for (user_id, ingredient_id), stored_amount, amount in mismatches:
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'сохранено {stored_amount}, ожидается {amount}'
+            )
+        if mismatches:
+            raise CommandError(f'Расхождений: {len(mismatches)}')
+        self.stdout.write(self.style.SUCCESS('Итоги корзин корректны'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.foodgram.models import Cart, Favorite, Recipe, RecipeStats
+from apps.users.models import Follow, User, UserStats
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков рецептов и пользователей'
+
+    @transaction.atomic
+    def handle(self, **kwargs):
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=pk) for pk in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True).iterator()),
+            batch_size=1000
+        )
+        users = UserStats.objects.update(
+            recipes_count=count_of(Recipe, 'author'),
+            followers_count=count_of(Follow, 'author')
+        )
+        RecipeStats.objects.bulk_create(
+            (RecipeStats(recipe_id=pk) for pk in Recipe.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True).iterator()),
+            batch_size=1000
+        )
+        recipes = RecipeStats.objects.update(
+            favorites_count=count_of(Favorite, 'recipe'),
+            carts_count=count_of(Cart, 'recipe')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: пользователей {users}, рецептов {recipes}'
+        ))
@@ -1,25 +1,106 @@
 import csv
+import json
+import time
 from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from apps.foodgram.ingredient_index import ingredient_index
 from apps.foodgram.models import Ingredient
+from apps.foodgram.versions import (INGREDIENTS_VERSION_KEY, bump_version,
+                                    is_process_local)
 
 PROJECT_DIR = Path(settings.BASE_DIR).resolve().joinpath('data')
 FILE_TO_OPEN = PROJECT_DIR / 'ingredients.csv'
+BATCH_SIZE = 1000
+DRY_RUN_SHOWN = 20
+
+
+def read_csv(file):
+    for row in csv.reader(file, delimiter=','):
+        if row:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {'csv': read_csv, 'json': read_json}
 
 
 class Command(BaseCommand):
     help = 'Импорт ингредиентов в БД'
 
-    def handle(self, **kwargs):
-        with open(
-            FILE_TO_OPEN, 'r', encoding='UTF-8'
-        ) as file:
-            reader = csv.reader(file, delimiter=',')
-            for row in reader:
-                Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measurement_unit=row[1]
-                )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=str(FILE_TO_OPEN),
+            help='Файл CSV или JSON (по умолчанию data/ingredients.csv)'
+        )
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла, если его нельзя определить по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Показать, какие ингредиенты будут добавлены, без записи'
+        )
+
+    def save_batch(self, batch, dry_run, shown):
+        if not dry_run:
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            return
+        for ingredient in batch[:max(DRY_RUN_SHOWN - shown, 0)]:
+            self.stdout.write(
+                f'+ {ingredient.name} ({ingredient.measurement_unit})'
+            )
+
+    def handle(self, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path.name}')
+        dry_run = options['dry_run']
+        start = time.perf_counter()
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        inserted = skipped = 0
+        batch = []
+        with open(path, 'r', encoding='UTF-8') as file, transaction.atomic():
+            for name, unit in READERS[file_format](file):
+                key = (name.strip(), unit.strip())
+                if key in existing:
+                    skipped += 1
+                    continue
+                existing.add(key)
+                batch.append(Ingredient(name=key[0], measurement_unit=key[1]))
+                if len(batch) >= options['batch_size']:
+                    self.save_batch(batch, dry_run, inserted)
+                    inserted += len(batch)
+                    batch = []
+            if batch:
+                self.save_batch(batch, dry_run, inserted)
+                inserted += len(batch)
+        if dry_run and inserted > DRY_RUN_SHOWN:
+            self.stdout.write(f'... и ещё {inserted - DRY_RUN_SHOWN}')
+        if inserted and not dry_run:
+            bump_version(INGREDIENTS_VERSION_KEY)
+            ingredient_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Будет добавлено" if dry_run else "Добавлено"}: {inserted}, '
+            f'пропущено: {skipped}, '
+            f'время: {time.perf_counter() - start:.2f} с'
+        ))
+        if inserted and not dry_run and is_process_local():
+            self.stderr.write(self.style.WARNING(
+                'Кэш default хранится в памяти процесса: запущенный '
+                'сервер API не увидит новую версию справочника и будет '
+                'отдавать старый список ингредиентов до перезапуска. '
+                'Задайте общий кэш в CACHE_BACKEND или перезапустите '
+                'сервер.'
+            ))
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_cart_ingredients(apps, schema_editor):
+    Cart = apps.get_model('foodgram', 'Cart')
+    CartIngredient = apps.get_model('foodgram', 'CartIngredient')
+    RecipeIngredient = apps.get_model('foodgram', 'RecipeIngredient')
+    totals = {}
+    carts = Cart.objects.values_list('user_id', 'recipe_id')
+    for user_id, recipe_id in carts.iterator():
+        for ingredient_id, amount in RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount'):
+            key = (user_id, ingredient_id)
+            totals[key] = totals.get(key, 0) + amount
+    CartIngredient.objects.bulk_create(
+        (CartIngredient(user_id=user_id, ingredient_id=ingredient_id,
+                        amount=amount)
+         for (user_id, ingredient_id), amount in totals.items()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foodgram', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='ед. изм'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Наименование'),
+        ),
+        migrations.CreateModel(
+            name='CartIngredient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='foodgram.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент списка покупок',
+                'verbose_name_plural': 'Ингредиенты списков покупок',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cartingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique cart ingredient'),
+        ),
+        migrations.RunPython(fill_cart_ingredients, migrations.RunPython.noop),
+    ]
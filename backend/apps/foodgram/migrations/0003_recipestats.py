@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_recipe_stats(apps, schema_editor):
+    Recipe = apps.get_model('foodgram', 'Recipe')
+    RecipeStats = apps.get_model('foodgram', 'RecipeStats')
+    RecipeStats.objects.bulk_create(
+        (RecipeStats(recipe_id=pk, favorites_count=favorites,
+                     carts_count=carts)
+         for pk, favorites, carts in Recipe.objects.annotate(
+             favorites_total=Count('favorites', distinct=True),
+             carts_total=Count('carts', distinct=True)
+        ).values_list('pk', 'favorites_total', 'carts_total').iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0002_cartingredient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='foodgram.recipe', verbose_name='Рецепт')),
+                ('favorites_count', models.PositiveIntegerField(default=0, verbose_name='Добавлений в избранное')),
+                ('carts_count', models.PositiveIntegerField(default=0, verbose_name='Добавлений в список покупок')),
+            ],
+            options={
+                'verbose_name': 'Статистика рецепта',
+                'verbose_name_plural': 'Статистика рецептов',
+            },
+        ),
+        migrations.RunPython(fill_recipe_stats, migrations.RunPython.noop),
+    ]
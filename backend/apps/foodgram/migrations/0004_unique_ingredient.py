@@ -0,0 +1,50 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:19
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('foodgram', 'Ingredient')
+    RecipeIngredient = apps.get_model('foodgram', 'RecipeIngredient')
+    CartIngredient = apps.get_model('foodgram', 'CartIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        extra_ids = list(Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=keep_id).values_list('id', flat=True))
+        RecipeIngredient.objects.filter(
+            ingredient_id__in=extra_ids
+        ).update(ingredient_id=keep_id)
+        for item in CartIngredient.objects.filter(ingredient_id__in=extra_ids):
+            kept, _ = CartIngredient.objects.get_or_create(
+                user_id=item.user_id, ingredient_id=keep_id,
+                defaults={'amount': 0}
+            )
+            kept.amount += item.amount
+            kept.save(update_fields=('amount',))
+            item.delete()
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0003_recipestats'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique ingredient'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0004_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='renditions_source',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Картинка, для которой готовы миниатюры'),
+        ),
+    ]
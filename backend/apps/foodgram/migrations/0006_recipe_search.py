@@ -0,0 +1,71 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:24
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INGREDIENT_NAMES_SQL = (
+    '(SELECT {agg} FROM foodgram_recipeingredient ri '
+    'JOIN foodgram_ingredient i ON i.id = ri.ingredient_id '
+    'WHERE ri.recipe_id = r.id)'
+)
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS foodgram_recipe_search_vector '
+            'ON foodgram_recipe USING GIN (search_vector)'
+        )
+        schema_editor.execute(
+            'UPDATE foodgram_recipe r SET search_vector = '
+            "setweight(to_tsvector(%s, coalesce(r.name, '')), 'A') || "
+            "setweight(to_tsvector(%s, coalesce({ingredients}, '')), 'B') "
+            "|| setweight(to_tsvector(%s, coalesce(r.text, '')), 'C')".format(
+                ingredients=INGREDIENT_NAMES_SQL.format(
+                    agg="string_agg(i.name, ' ')"
+                )
+            ),
+            ['russian'] * 3
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS foodgram_recipe_fts '
+            'USING fts5(name, ingredients, text, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO foodgram_recipe_fts (rowid, name, ingredients, text) '
+            "SELECT r.id, r.name, coalesce({ingredients}, ''), r.text "
+            'FROM foodgram_recipe r'.format(
+                ingredients=INGREDIENT_NAMES_SQL.format(
+                    agg="group_concat(i.name, ' ')"
+                )
+            )
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS foodgram_recipe_search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS foodgram_recipe_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0005_recipe_renditions_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def duplicates(model, fields):
+    return model.objects.values(*fields).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+
+
+def remove_duplicates(apps, schema_editor):
+    Cart = apps.get_model('foodgram', 'Cart')
+    CartIngredient = apps.get_model('foodgram', 'CartIngredient')
+    Favorite = apps.get_model('foodgram', 'Favorite')
+    Recipe = apps.get_model('foodgram', 'Recipe')
+    RecipeIngredient = apps.get_model('foodgram', 'RecipeIngredient')
+    RecipeStats = apps.get_model('foodgram', 'RecipeStats')
+
+    # Повторы ингредиента в рецепте сливаются в одну строку с суммой.
+    for item in duplicates(RecipeIngredient, ('recipe', 'ingredient')):
+        rows = RecipeIngredient.objects.filter(
+            recipe_id=item['recipe'], ingredient_id=item['ingredient']
+        )
+        amount = rows.aggregate(total=Sum('amount'))['total']
+        rows.exclude(id=item['keep_id']).delete()
+        rows.update(amount=amount)
+
+    recipe_ids = set()
+    cart_users = set()
+    for model in (Favorite, Cart):
+        for item in duplicates(model, ('user', 'recipe')):
+            model.objects.filter(
+                user_id=item['user'], recipe_id=item['recipe']
+            ).exclude(id=item['keep_id']).delete()
+            recipe_ids.add(item['recipe'])
+            if model is Cart:
+                cart_users.add(item['user'])
+
+    # Счётчики и итоги корзин учитывали удалённые повторы.
+    for pk, favorites, carts in Recipe.objects.filter(
+        pk__in=recipe_ids
+    ).annotate(
+        favorites_total=Count('favorites', distinct=True),
+        carts_total=Count('carts', distinct=True)
+    ).values_list('pk', 'favorites_total', 'carts_total'):
+        RecipeStats.objects.update_or_create(recipe_id=pk, defaults={
+            'favorites_count': favorites, 'carts_count': carts
+        })
+    CartIngredient.objects.filter(user_id__in=cart_users).delete()
+    CartIngredient.objects.bulk_create(
+        CartIngredient(user_id=user_id, ingredient_id=ingredient_id,
+                       amount=amount)
+        for user_id, ingredient_id, amount in Cart.objects.filter(
+            user_id__in=cart_users
+        ).values_list(
+            'user_id', 'recipe__recipe_ingredients__ingredient_id'
+        ).annotate(
+            Sum('recipe__recipe_ingredients__amount')
+        ).order_by()
+        if ingredient_id is not None
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0006_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique cart'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique favorite'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique recipe ingredient'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0007_unique_user_recipe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Наименование'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.core.validators import MinValueValidator, UniqueValidator
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator
 from django.db import models
 
 from ..users.models import User
@@ -9,6 +10,7 @@ REC = "recipes"
 INGRED = "recipe_ingredients"
 CART = "carts"
 FAV = "favorites"
+CART_INGRED = "cart_ingredients"
 
 
 class Ingredient(models.Model):
@@ -27,6 +29,12 @@ class Ingredient(models.Model):
         ordering = ('-id',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -56,6 +64,12 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    def get_queryset(self):
+        # Вектор нужен только для поиска в базе, читать его незачем.
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -66,15 +80,24 @@ class Recipe(models.Model):
     name = models.CharField(
         'Наименование',
         max_length=settings.DEFAULT_MAX_LENGTH,
-        validators=[UniqueValidator(queryset=User.objects.all())]
+        db_index=True
     )
     image = models.ImageField(upload_to='recipes/', verbose_name='Картинка')
+    renditions_source = models.CharField(
+        'Картинка, для которой готовы миниатюры',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
     text = models.TextField('Описание рецепта')
     tags = models.ManyToManyField(Tag, verbose_name='Теги')
     cooking_time = models.PositiveSmallIntegerField(
         'Время приготовления',
         validators=(MinValueValidator(settings.MIN_VALUE_TO_INT_FIELD),)
     )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
 
     class Meta:
         ordering = ('-id',)
@@ -85,6 +108,30 @@ class Recipe(models.Model):
         return self.name
 
 
+class RecipeStats(models.Model):
+    """Денормализованные счётчики рецепта."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Рецепт'
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0
+    )
+    carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика рецепта'
+        verbose_name_plural = 'Статистика рецептов'
+
+    def __str__(self):
+        return f'{self.recipe.name}: {self.favorites_count} в избранном'
+
+
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -106,6 +153,12 @@ class RecipeIngredient(models.Model):
         ordering = ('-id',)
         verbose_name = 'Ингредиенты рецепта'
         verbose_name_plural = 'Ингредиенты рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique recipe ingredient'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipe.name} - {self.ingredient.name}: {self.amount}'
@@ -121,18 +174,55 @@ class Cart(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        verbose_name='Рецепт',
+        related_name=CART,
+        verbose_name='Рецепт'
     )
 
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Покупки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique cart'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
 
 
+class CartIngredient(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name=CART_INGRED,
+        verbose_name='Покупатель'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField('Количество')
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique cart ingredient'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.ingredient.name}: {self.amount}'
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -143,6 +233,7 @@ class Favorite(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
+        related_name=FAV,
         verbose_name='Рецепт'
     )
 
@@ -150,6 +241,12 @@ class Favorite(models.Model):
         ordering = ('-id',)
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique favorite'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
@@ -0,0 +1,261 @@
+"""Обратный индекс «ингредиент → рецепты» в памяти процесса.
+
+Нужен для подбора рецептов, которым не хватает не больше n
+ингредиентов: в базе это группировка всех строк RecipeIngredient
+рецептов-кандидатов. Для каждого ингредиента хранится битовое
+множество id рецептов (обычное целое Python: бит n установлен, если
+рецепт n содержит ингредиент), а число ингредиентов каждого рецепта —
+«вертикально», по битовому множеству на каждый разряд. Тогда число
+недостающих ингредиентов всех рецептов считается сложением и
+вычитанием битовых множеств.
+
+Изменения рецептов записываются в журнал в кэше: сигналы после
+фиксации транзакции увеличивают общий счётчик и сохраняют id
+изменённого рецепта под его номером. Перед каждым запросом индекс
+перечитывает из базы ингредиенты рецептов, изменившихся с последней
+синхронизации, а если журнал потерян или слишком длинный, строится
+заново. Если рецептов больше RECIPE_INDEX_MAX_RECIPES, индекс не
+строится, и missing_at_most возвращает None: вызывающий код
+выполняет запрос к базе.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Recipe, RecipeIngredient
+
+SEQ_KEY = 'recipe_index:seq'
+CHANGE_KEY = 'recipe_index:change:{}'
+CHANGE_TIMEOUT = 60 * 60 * 24
+MAX_REPLAYED_CHANGES = 1000
+
+
+def to_bitset(ids):
+    ids = list(ids)
+    buffer = bytearray((max(ids) >> 3) + 1 if ids else 0)
+    for pk in ids:
+        buffer[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def from_bitset(bitset):
+    """Номера установленных битов по убыванию."""
+    bits = bin(bitset)[2:]
+    last = len(bits) - 1
+    ids = []
+    position = bits.find('1')
+    while position != -1:
+        ids.append(last - position)
+        position = bits.find('1', position + 1)
+    return ids
+
+
+def add_to_planes(planes, bitset):
+    """Прибавляет 1 к счётчикам рецептов из bitset."""
+    carry = bitset
+    for position, plane in enumerate(planes):
+        if not carry:
+            return
+        planes[position], carry = plane ^ carry, plane & carry
+    if carry:
+        planes.append(carry)
+
+
+def subtract_planes(minuend, subtrahend):
+    """Поразрядная разность счётчиков (уменьшаемое не меньше вычитаемого)."""
+    result = []
+    borrow = 0
+    for position, minuend_plane in enumerate(minuend):
+        subtrahend_plane = (
+            subtrahend[position] if position < len(subtrahend) else 0
+        )
+        result.append(minuend_plane ^ subtrahend_plane ^ borrow)
+        borrow = (
+            ~minuend_plane & (subtrahend_plane | borrow)
+            | subtrahend_plane & borrow
+        )
+    return result
+
+
+def select_equal(planes, value, candidates):
+    """Рецепты из candidates, у которых счётчик равен value."""
+    if value >> len(planes):
+        return 0
+    result = candidates
+    for position, plane in enumerate(planes):
+        result &= plane if value >> position & 1 else ~plane
+    return result
+
+
+def record_change(recipe_id):
+    cache.add(SEQ_KEY, 0, None)
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:
+        return
+    cache.set(CHANGE_KEY.format(seq), recipe_id, CHANGE_TIMEOUT)
+
+
+def record_full_change():
+    """Заставляет все процессы перестроить индекс целиком."""
+    cache.add(SEQ_KEY, 0, None)
+    try:
+        cache.incr(SEQ_KEY, MAX_REPLAYED_CHANGES + 1)
+    except ValueError:
+        pass
+
+
+def record_change_on_commit(recipe_id):
+    transaction.on_commit(lambda: record_change(recipe_id))
+
+
+class RecipeIngredientIndex:
+    """Индекс рецептов по ингредиентам.
+
+    С sync=False индекс не читает журнал изменений и базу, а отвечает
+    только по данным, переданным в load(), — например, в бенчмарке
+    на синтетическом наборе. Ограничение RECIPE_INDEX_MAX_RECIPES
+    к нему не применяется.
+    """
+
+    def __init__(self, sync=True):
+        self.sync = sync
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._seq = None
+        self._recipes = {}
+        self._ingredients = {}
+        self._count_planes = []
+
+    def invalidate(self):
+        """Заставляет перестроить индекс при следующем запросе."""
+        with self._lock:
+            self._seq = None
+
+    def load(self, recipes):
+        """Строит индекс по словарю «id рецепта → id ингредиентов»."""
+        by_ingredient = {}
+        by_count_bit = {}
+        for recipe_id, ingredient_ids in recipes.items():
+            for ingredient_id in ingredient_ids:
+                by_ingredient.setdefault(ingredient_id, []).append(recipe_id)
+            count = len(ingredient_ids)
+            for position in range(count.bit_length()):
+                if count >> position & 1:
+                    by_count_bit.setdefault(position, []).append(recipe_id)
+        self._recipes = {
+            recipe_id: frozenset(ingredient_ids)
+            for recipe_id, ingredient_ids in recipes.items()
+        }
+        self._ingredients = {
+            ingredient_id: to_bitset(recipe_ids)
+            for ingredient_id, recipe_ids in by_ingredient.items()
+        }
+        self._count_planes = [
+            to_bitset(by_count_bit.get(position, ()))
+            for position in range(max(by_count_bit, default=-1) + 1)
+        ]
+
+    @staticmethod
+    def fetch(recipe_ids=None):
+        rows = RecipeIngredient.objects.order_by()
+        recipes = {}
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+            recipes = {recipe_id: set() for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in rows.values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator():
+            recipes.setdefault(recipe_id, set()).add(ingredient_id)
+        return recipes
+
+    def update_recipe(self, recipe_id, ingredient_ids):
+        ingredient_ids = frozenset(ingredient_ids)
+        old_ids = self._recipes.pop(recipe_id, frozenset())
+        if ingredient_ids:
+            self._recipes[recipe_id] = ingredient_ids
+        bit = 1 << recipe_id
+        for ingredient_id in old_ids - ingredient_ids:
+            self._ingredients[ingredient_id] &= ~bit
+        for ingredient_id in ingredient_ids - old_ids:
+            self._ingredients[ingredient_id] = (
+                self._ingredients.get(ingredient_id, 0) | bit
+            )
+        changed = len(old_ids) ^ len(ingredient_ids)
+        for position in range(changed.bit_length()):
+            if changed >> position & 1:
+                if position == len(self._count_planes):
+                    self._count_planes.append(0)
+                self._count_planes[position] ^= bit
+
+    def _sync(self):
+        cache.add(SEQ_KEY, 0, None)
+        seq = cache.get(SEQ_KEY, 0)
+        if seq == self._seq:
+            return
+        changes = {}
+        if (self.enabled and self._seq is not None
+                and 0 < seq - self._seq <= MAX_REPLAYED_CHANGES):
+            keys = [
+                CHANGE_KEY.format(number)
+                for number in range(self._seq + 1, seq + 1)
+            ]
+            changes = cache.get_many(keys)
+            if len(changes) != len(keys):
+                changes = {}
+        if changes:
+            for recipe_id, ingredient_ids in self.fetch(
+                set(changes.values())
+            ).items():
+                self.update_recipe(recipe_id, ingredient_ids)
+            self.enabled = (
+                len(self._recipes) <= settings.RECIPE_INDEX_MAX_RECIPES
+            )
+        else:
+            self.enabled = (
+                Recipe.objects.count() <= settings.RECIPE_INDEX_MAX_RECIPES
+            )
+        if not self.enabled:
+            self.load({})
+        elif not changes:
+            self.load(self.fetch())
+        self._seq = seq
+
+    def _snapshot(self, ingredient_ids):
+        with self._lock:
+            if self.sync:
+                self._sync()
+            if not self.enabled:
+                return None
+            return (
+                [self._ingredients.get(pk, 0) for pk in set(ingredient_ids)],
+                list(self._count_planes)
+            )
+
+    def missing_at_most(self, ingredient_ids, limit):
+        """Рецепты хотя бы с одним из ингредиентов, которым не хватает
+        не больше limit других.
+
+        Возвращает список групп: в группе с индексом n — id рецептов,
+        которым не хватает ровно n ингредиентов, по убыванию. Если
+        индекс выключен из-за числа рецептов, возвращает None.
+        """
+        snapshot = self._snapshot(ingredient_ids)
+        if snapshot is None:
+            return None
+        bitsets, count_planes = snapshot
+        have_planes = []
+        candidates = 0
+        for bitset in bitsets:
+            add_to_planes(have_planes, bitset)
+            candidates |= bitset
+        missing_planes = subtract_planes(count_planes, have_planes)
+        return [
+            from_bitset(select_equal(missing_planes, missing, candidates))
+            for missing in range(limit + 1)
+        ]
+
+
+recipe_index = RecipeIngredientIndex()
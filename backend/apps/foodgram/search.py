@@ -0,0 +1,119 @@
+"""Полнотекстовый поиск рецептов по названию, описанию и ингредиентам.
+
+На PostgreSQL документ рецепта хранится в колонке search_vector
+(tsvector с русской морфологией и GIN-индексом): название имеет вес A,
+ингредиенты — B, описание — C. На SQLite для локальной разработки
+используется отдельная таблица FTS5, в которой rowid совпадает с id
+рецепта; морфологии там нет, поэтому слова запроса ищутся по
+префиксу. На остальных СУБД поиск сводится к icontains.
+
+Документы пересобираются после фиксации транзакции сигналами
+изменения рецептов, их ингредиентов и справочника ингредиентов.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, When
+
+SEARCH_CONFIG = 'russian'
+SEARCH_MAX_RESULTS = 1000
+FTS_TABLE = 'foodgram_recipe_fts'
+
+INGREDIENT_NAMES_SQL = (
+    '(SELECT {agg} FROM foodgram_recipeingredient ri '
+    'JOIN foodgram_ingredient i ON i.id = ri.ingredient_id '
+    'WHERE ri.recipe_id = r.id)'
+)
+POSTGRES_UPDATE_SQL = (
+    'UPDATE foodgram_recipe r SET search_vector = '
+    "setweight(to_tsvector(%s, coalesce(r.name, '')), 'A') || "
+    "setweight(to_tsvector(%s, coalesce({ingredients}, '')), 'B') || "
+    "setweight(to_tsvector(%s, coalesce(r.text, '')), 'C')"
+).format(ingredients=INGREDIENT_NAMES_SQL.format(
+    agg="string_agg(i.name, ' ')"
+))
+SQLITE_INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+    'SELECT r.id, r.name, coalesce({ingredients}, \'\'), r.text '
+    'FROM foodgram_recipe r'
+).format(ingredients=INGREDIENT_NAMES_SQL.format(
+    agg="group_concat(i.name, ' ')"
+))
+# Веса столбцов name, ingredients, text для bm25.
+SQLITE_SEARCH_SQL = (
+    f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+    f'ORDER BY bm25({FTS_TABLE}, 10.0, 5.0, 1.0) LIMIT %s'
+)
+WORD_RE = re.compile(r'\w+')
+
+
+def update_search_index(recipe_ids=None, using=connection):
+    """Пересобирает документы рецептов recipe_ids (или всех)."""
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        where = ' WHERE r.id IN ({})'.format(
+            ', '.join(['%s'] * len(recipe_ids))
+        )
+        params = recipe_ids
+    else:
+        where, params = '', []
+    with using.cursor() as cursor:
+        if using.vendor == 'postgresql':
+            cursor.execute(
+                POSTGRES_UPDATE_SQL + where,
+                [SEARCH_CONFIG] * 3 + params
+            )
+        elif using.vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE}'
+                + where.replace('r.id', 'rowid'),
+                params
+            )
+            cursor.execute(SQLITE_INSERT_SQL + where, params)
+
+
+def update_search_index_on_commit(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: update_search_index(recipe_ids))
+
+
+def get_match_query(value):
+    """Запрос FTS5: все слова обязательны и ищутся по префиксу."""
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(value))
+
+
+def search_recipes(queryset, value):
+    """Оставляет рецепты, подходящие под запрос, по убыванию релевантности."""
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-id')
+    if connection.vendor == 'sqlite':
+        match_query = get_match_query(value)
+        if not match_query:
+            return queryset.none()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SQLITE_SEARCH_SQL, (match_query, SEARCH_MAX_RESULTS)
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ids).annotate(
+            search_rank=Case(
+                *(When(pk=pk, then=-position)
+                  for position, pk in enumerate(ids)),
+                output_field=IntegerField()
+            )
+        ).order_by('-search_rank', '-id')
+    return queryset.filter(
+        Q(name__icontains=value)
+        | Q(text__icontains=value)
+        | Q(recipe_ingredients__ingredient__name__icontains=value)
+    ).distinct()
@@ -0,0 +1,131 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from ..users.counters import change_counter
+from ..users.models import User, UserStats
+from . import user_recipes
+from .images import schedule_renditions
+from .ingredient_index import ingredient_index
+from .models import Cart, Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from .recipe_index import record_change_on_commit
+from .search import update_search_index_on_commit
+from .versions import (INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY,
+                       bump_recipe_version_on_commit,
+                       bump_recipe_versions_on_commit,
+                       bump_recipes_epoch_on_commit, bump_version_on_commit)
+
+# Поля пользователя, входящие в представление рецепта (author).
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+@receiver(post_save, sender=Cart)
+def cart_created(sender, instance, created, **kwargs):
+    if created:
+        user_recipes.carts_added(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(pre_delete, sender=Cart)
+def cart_deleted(sender, instance, **kwargs):
+    # pre_delete: при каскадном удалении рецепта его ингредиенты
+    # ещё не удалены и их количество можно вычесть из итогов.
+    user_recipes.carts_removed(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        user_recipes.favorites_added(
+            instance.user_id, (instance.recipe_id,)
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    user_recipes.favorites_removed(
+        instance.user_id, (instance.recipe_id,)
+    )
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    bump_version_on_commit(INGREDIENTS_VERSION_KEY)
+    bump_recipes_epoch_on_commit()
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index_on_commit(RecipeIngredient.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    bump_version_on_commit(TAGS_VERSION_KEY)
+    bump_recipes_epoch_on_commit()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    bump_recipe_version_on_commit(instance.pk)
+    update_search_index_on_commit([instance.pk])
+    record_change_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(UserStats, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    schedule_renditions(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(UserStats, instance.author_id, 'recipes_count', -1)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    bump_recipe_version_on_commit(instance.recipe_id)
+    update_search_index_on_commit([instance.recipe_id])
+    record_change_on_commit(instance.recipe_id)
+
+
+@receiver(pre_save, sender=User)
+def author_changed(sender, instance, raw, update_fields=None, **kwargs):
+    # Новый пользователь ещё не автор, а вход в систему, смена пароля и
+    # т.п. не меняют полей автора в представлении рецепта. Удаление
+    # автора удаляет и его рецепты, их версии повышает recipe_changed.
+    if raw or instance.pk is None:
+        return
+    if update_fields and not AUTHOR_FIELDS.intersection(update_fields):
+        return
+    saved = User.objects.filter(pk=instance.pk).values(*AUTHOR_FIELDS).first()
+    if saved is None or all(
+        saved[field] == getattr(instance, field) for field in AUTHOR_FIELDS
+    ):
+        return
+    bump_recipe_versions_on_commit(list(
+        Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    ))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_recipe_version_on_commit(instance.pk)
+    elif pk_set is None:
+        bump_recipes_epoch_on_commit()
+    else:
+        for recipe_id in pk_set:
+            bump_recipe_version_on_commit(recipe_id)
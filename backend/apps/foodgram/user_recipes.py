@@ -0,0 +1,88 @@
+"""Избранное и список покупок: добавление и удаление одним запросом.
+
+Добавление — это INSERT ... ON CONFLICT DO NOTHING, опирающийся на
+уникальность пары (user, recipe), поэтому повторный или параллельный
+запрос не создаёт дубликатов, а RETURNING сообщает, какие строки
+действительно появились. Удаление — один DELETE по паре (или по
+списку рецептов), без предварительного чтения. Оба запроса минуют
+сигналы моделей, поэтому итоги корзины и счётчики рецептов
+обновляются здесь явно теми же функциями, которые вызывают сигналы
+при изменениях через ORM.
+"""
+from django.db import connection, transaction
+
+from ..users.counters import change_counters
+from . import cart_totals
+from .models import Cart, Favorite, RecipeStats
+
+INSERT_SQL = (
+    'INSERT INTO {table} (user_id, recipe_id) VALUES {values} '
+    'ON CONFLICT (user_id, recipe_id) DO NOTHING RETURNING recipe_id'
+)
+DELETE_SQL = (
+    'DELETE FROM {table} WHERE user_id = %s AND recipe_id IN ({values}) '
+    'RETURNING recipe_id'
+)
+
+
+def favorites_added(user_id, recipe_ids):
+    change_counters(RecipeStats, recipe_ids, 'favorites_count', 1)
+
+
+def favorites_removed(user_id, recipe_ids):
+    change_counters(RecipeStats, recipe_ids, 'favorites_count', -1)
+
+
+def carts_added(user_id, recipe_ids):
+    cart_totals.add_recipes(user_id, recipe_ids)
+    change_counters(RecipeStats, recipe_ids, 'carts_count', 1)
+
+
+def carts_removed(user_id, recipe_ids):
+    cart_totals.remove_recipes(user_id, recipe_ids)
+    change_counters(RecipeStats, recipe_ids, 'carts_count', -1)
+
+
+ADDED = {Favorite: favorites_added, Cart: carts_added}
+REMOVED = {Favorite: favorites_removed, Cart: carts_removed}
+
+
+def execute(model, sql, values, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(
+            table=connection.ops.quote_name(model._meta.db_table),
+            values=values
+        ), params)
+        return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
+@transaction.atomic
+def add(model, user_id, recipe_ids):
+    """Добавляет рецепты; возвращает id тех, которых ещё не было."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return set()
+    added = execute(
+        model, INSERT_SQL,
+        ', '.join(['(%s, %s)'] * len(recipe_ids)),
+        [value for recipe_id in recipe_ids for value in (user_id, recipe_id)]
+    )
+    if added:
+        ADDED[model](user_id, added)
+    return added
+
+
+@transaction.atomic
+def remove(model, user_id, recipe_ids):
+    """Удаляет рецепты; возвращает id тех, что действительно были."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return set()
+    removed = execute(
+        model, DELETE_SQL,
+        ', '.join(['%s'] * len(recipe_ids)),
+        [user_id, *recipe_ids]
+    )
+    if removed:
+        REMOVED[model](user_id, removed)
+    return removed
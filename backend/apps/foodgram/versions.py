@@ -0,0 +1,160 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+
+CART_VERSION_KEY = 'cart_version:{}'
+CARTS_EPOCH_KEY = 'carts_epoch'
+TOKEN_VERSION_KEY = 'token_version:{}'
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+TAGS_VERSION_KEY = 'tags_version'
+RECIPES_VERSION_KEY = 'recipes_version'
+RECIPE_VERSION_KEY = 'recipe_version:{}'
+RECIPES_EPOCH_KEY = 'recipes_epoch'
+MODIFIED_KEY = '{}:modified'
+# Версии рецептов хранятся в том же кэше, что и закэшированные по ним
+# ответы и представления (api.foodgram.response_cache): процессы,
+# разделяющие этот кэш, видят и одни и те же версии.
+RECIPES_CACHE_ALIAS = 'responses'
+
+
+def _initial_version():
+    # Версия начинается с текущего времени, чтобы после вытеснения ключа
+    # из кэша не выдать заново уже использованный номер.
+    return int(time.time() * 1000)
+
+
+def get_version(key, alias=DEFAULT_CACHE_ALIAS):
+    cache = caches[alias]
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, _initial_version(), None)
+    return cache.get(key)
+
+
+def get_versions(keys, alias=DEFAULT_CACHE_ALIAS):
+    """Возвращает словарь версий для нескольких ключей за один запрос."""
+    cache = caches[alias]
+    versions = cache.get_many(keys)
+    missing = {
+        key: _initial_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def bump_version(key, alias=DEFAULT_CACHE_ALIAS):
+    cache = caches[alias]
+    cache.set(MODIFIED_KEY.format(key), time.time(), None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
+
+
+def bump_version_on_commit(key, alias=DEFAULT_CACHE_ALIAS):
+    """Повышает версию после фиксации текущей транзакции.
+
+    Иначе параллельный запрос успеет закэшировать старые данные
+    под уже новой версией.
+    """
+    transaction.on_commit(lambda: bump_version(key, alias))
+
+
+def is_process_local(alias=DEFAULT_CACHE_ALIAS):
+    """True, если кэш alias живёт в памяти процесса (LocMemCache).
+
+    Версии, повышенные в таком кэше, например management-командой,
+    не видны другим процессам, в том числе серверу API.
+    """
+    return settings.CACHES[alias]['BACKEND'].endswith('.LocMemCache')
+
+
+def get_last_modified(key, alias=DEFAULT_CACHE_ALIAS):
+    """Время последнего повышения версии (unix time) или None."""
+    return caches[alias].get(MODIFIED_KEY.format(key))
+
+
+def bump_recipe_version_on_commit(recipe_id):
+    bump_version_on_commit(RECIPES_VERSION_KEY, RECIPES_CACHE_ALIAS)
+    bump_version_on_commit(
+        RECIPE_VERSION_KEY.format(recipe_id), RECIPES_CACHE_ALIAS
+    )
+
+
+def bump_recipe_versions_on_commit(recipe_ids):
+    """Сбрасывает представления только перечисленных рецептов."""
+    def bump():
+        bump_version(RECIPES_VERSION_KEY, RECIPES_CACHE_ALIAS)
+        for recipe_id in recipe_ids:
+            bump_version(
+                RECIPE_VERSION_KEY.format(recipe_id), RECIPES_CACHE_ALIAS
+            )
+    transaction.on_commit(bump)
+
+
+def bump_recipes_epoch_on_commit():
+    """Сбрасывает представления всех рецептов (изменились теги и т.п.)."""
+    bump_version_on_commit(RECIPES_VERSION_KEY, RECIPES_CACHE_ALIAS)
+    bump_version_on_commit(RECIPES_EPOCH_KEY, RECIPES_CACHE_ALIAS)
+
+
+def bump_cart_version_on_commit(user_id):
+    bump_version_on_commit(CART_VERSION_KEY.format(user_id))
+
+
+def bump_carts_epoch_on_commit():
+    """Сбрасывает закэшированные списки покупок всех пользователей."""
+    bump_version_on_commit(CARTS_EPOCH_KEY)
+
+
+def get_token_cache():
+    """Кэш версий токенов: общий кэш аутентификации, если он задан."""
+    return caches[settings.TOKEN_CACHE_ALIAS or DEFAULT_CACHE_ALIAS]
+
+
+def get_token_version(key):
+    """Версия токена или None, если токен ещё не кэшировался.
+
+    Ключ версии не создаётся при чтении, иначе каждый присланный
+    (в том числе несуществующий) токен оставлял бы в кэше запись.
+    """
+    return get_token_cache().get(TOKEN_VERSION_KEY.format(key))
+
+
+def add_token_version(key):
+    """Заводит версию токена после его успешной загрузки из базы.
+
+    Возвращает None, если версию успели создать параллельно, например
+    сбросом токена: тогда загруженные данные могли устареть.
+    """
+    version = _initial_version()
+    if get_token_cache().add(
+        TOKEN_VERSION_KEY.format(key), version, settings.TOKEN_CACHE_TTL
+    ):
+        return version
+    return None
+
+
+def bump_token_version(key):
+    cache = get_token_cache()
+    key = TOKEN_VERSION_KEY.format(key)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Записи кэша живут не дольше TOKEN_CACHE_TTL, поэтому и версия
+        # нужна не дольше: исчезнув, она станет промахом.
+        version = _initial_version()
+        cache.set(key, version, settings.TOKEN_CACHE_TTL)
+        return version
+
+
+def bump_token_version_on_commit(key):
+    """Сбрасывает закэшированную аутентификацию по токену key."""
+    transaction.on_commit(lambda: bump_token_version(key))
@@ -0,0 +1,30 @@
+"""Атомарное изменение денормализованных счётчиков.
+
+Счётчики хранятся в отдельных таблицах (UserStats, RecipeStats) с
+первичным ключом по объекту, чтобы полное сохранение пользователя или
+рецепта не перезаписывало их устаревшими значениями.
+"""
+from django.db.models import F
+
+
+def change_counters(model, pks, field, delta):
+    """Прибавляет delta к полю field строк pks выражением F().
+
+    Строки создаются при первом увеличении счётчика.
+    """
+    pks = set(pks)
+    if model.objects.filter(pk__in=pks).update(
+        **{field: F(field) + delta}
+    ) == len(pks) or delta <= 0:
+        return
+    missing = pks.difference(
+        model.objects.filter(pk__in=pks).values_list('pk', flat=True)
+    )
+    model.objects.bulk_create(
+        (model(pk=pk) for pk in missing), ignore_conflicts=True
+    )
+    model.objects.filter(pk__in=missing).update(**{field: F(field) + delta})
+
+
+def change_counter(model, pk, field, delta):
+    change_counters(model, (pk,), field, delta)
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_user_stats(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    UserStats = apps.get_model('users', 'UserStats')
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk, recipes_count=recipes,
+                   followers_count=followers)
+         for pk, recipes, followers in User.objects.annotate(
+             recipes_total=Count('recipes', distinct=True),
+             followers_total=Count('following', distinct=True)
+        ).values_list('pk', 'recipes_total', 'followers_total').iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+        ('foodgram', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user', verbose_name='Пользователь')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Рецептов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
@@ -32,3 +32,23 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.author.username}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    recipes_count = models.PositiveIntegerField('Рецептов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'{self.user.username}: {self.recipes_count} рецептов'
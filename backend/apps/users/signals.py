@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from ..foodgram.versions import bump_token_version_on_commit
+from .counters import change_counter
+from .models import Follow, User, UserStats
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(UserStats, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(UserStats, instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Деактивация и правка профиля должны сбросить закэшированного
+    # пользователя, а вход обновляет только last_login.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True
+    ):
+        bump_token_version_on_commit(key)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    bump_token_version_on_commit(instance.key)
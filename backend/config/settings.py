@@ -13,8 +13,36 @@ DEBUG = os.getenv('DEBUG', default=False)
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', default='*').split(';')
 
+# Профилирование запросов (Server-Timing) и эндпоинт метрик Prometheus.
+PROFILING = os.getenv('PROFILING', default='') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+# Поиск N+1 и медленных запросов для тестов и стенда.
+QUERY_INSPECTION = os.getenv('QUERY_INSPECTION', default='') == 'True'
+QUERY_INSPECTION_RAISE = (
+    os.getenv('QUERY_INSPECTION_RAISE', default='') == 'True'
+)
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', default=5))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', default=100))
+
 DEFAULT_MAX_LENGTH = 200
 MIN_VALUE_TO_INT_FIELD = 1
+# Предел PositiveSmallIntegerField (количество ингредиента в рецепте).
+MAX_VALUE_TO_SMALL_INT_FIELD = 32767
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+INGREDIENT_SEARCH_LIMIT = 50
+CATALOGUE_CACHE_TIMEOUT = 60 * 60 * 24
+RECIPE_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 4096 * 4096
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+RECIPE_INDEX_MAX_RESULTS = 10000
+# Больше рецептов индекс ингредиентов в памяти не держит: подбор по
+# недостающим ингредиентам выполняется запросом к базе.
+RECIPE_INDEX_MAX_RECIPES = int(
+    os.getenv('RECIPE_INDEX_MAX_RECIPES', default=100000)
+)
+RECIPE_INDEX_MAX_MISSING = 10
+RECIPE_BATCH_LIMIT = 100
+RECIPE_MULTI_GET_LIMIT = 100
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -42,6 +70,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if QUERY_INSPECTION:
+    MIDDLEWARE.insert(0, 'api.query_inspection.QueryInspectionMiddleware')
+if PROFILING:
+    MIDDLEWARE.insert(0, 'api.profiling.ProfilingMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -112,6 +145,51 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# В default лежат версии справочников, корзин и токенов, журнал
+# изменений индекса рецептов и закэшированные по этим версиям данные.
+# LocMemCache у каждого процесса свой, поэтому, если API обслуживает
+# больше одного процесса (воркеры gunicorn, отдельные management-команды),
+# default должен быть общим: Redis, Memcached или FileBasedCache с
+# общим каталогом. Иначе изменение в одном процессе не сбросит кэши
+# остальных.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='default'),
+    },
+    # Кэш ответов для анонимных пользователей и общих представлений
+    # рецептов вместе с версиями рецептов, по которым они сбрасываются.
+    # Без внешних сервисов можно использовать LocMemCache или
+    # FileBasedCache с каталогом в LOCATION; для нескольких процессов
+    # кэш тоже должен быть общим.
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', default='responses'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=60 * 60)),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Кэш аутентификации по токену: записей в процессе, время жизни записи
+# и необязательный общий кэш из CACHES. Версии токенов хранятся в
+# TOKEN_CACHE_ALIAS (или default); если этот кэш в памяти процесса,
+# выход или деактивация в одном воркере не сбросили бы записи других,
+# поэтому без общего кэша TOKEN_CACHE_TTL по умолчанию 0 (кэш выключен).
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', default='')
+TOKEN_CACHE_SHARED = not CACHES[TOKEN_CACHE_ALIAS or 'default'][
+    'BACKEND'
+].endswith('.LocMemCache')
+TOKEN_CACHE_TTL = int(os.getenv(
+    'TOKEN_CACHE_TTL', default=5 * 60 if TOKEN_CACHE_SHARED else 0
+))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 REST_FRAMEWORK = {
@@ -119,7 +197,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],